@@ -0,0 +1,85 @@
+"""Wall clock of `ResourseGenerator.generate` per parallel mode.
+
+Runs on the bundled icons and on a synthetic set of 2,000 icons. Run from
+the repository root with the package and a Qt binding installed:
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/generate.py
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+try:
+    import PySide6.QtCore  # noqa: F401
+except ImportError:
+    import PyQt6.QtCore  # noqa: F401
+
+from qt_material6.resources import ResourseGenerator, shutdown_pools
+
+SOURCE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..",
+    "src",
+    "qt_material6",
+    "resources",
+    "source",
+)
+SYNTHETIC = 2000
+REPEAT = 5
+
+
+def synthetic_source(folder, count):
+    """Fill `folder` with `count` copies of the bundled icons."""
+    os.makedirs(folder)
+    icons = sorted(i for i in os.listdir(SOURCE) if i.endswith(".svg"))
+    for i in range(count):
+        icon = icons[i % len(icons)]
+        shutil.copy(
+            os.path.join(SOURCE, icon), os.path.join(folder, f"{i}_{icon}")
+        )
+    return folder
+
+
+def measure(source, parent, parallel):
+    """Best wall clock of `REPEAT` generations, in milliseconds."""
+    ResourseGenerator.parallel = parallel
+    best = None
+    for _ in range(REPEAT):
+        generator = ResourseGenerator(
+            primary="#1de9b6",
+            secondary="#232629",
+            disabled="#4f5b62",
+            source=source,
+            parent=parent,
+        )
+        start = time.perf_counter()
+        generator.generate()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    """"""
+    with tempfile.TemporaryDirectory() as folder:
+        sets = [
+            ("bundled", SOURCE),
+            (
+                f"synthetic {SYNTHETIC}",
+                synthetic_source(os.path.join(folder, "source"), SYNTHETIC),
+            ),
+        ]
+        parent = os.path.join(folder, "theme")
+        for name, source in sets:
+            for parallel in [None, "thread", "process"]:
+                # The first run of a pool includes starting its workers.
+                measure(source, parent, parallel)
+                elapsed = measure(source, parent, parallel)
+                print(f"{name:>15} {str(parallel):>8}: {elapsed:8.1f} ms")
+    shutdown_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Import time of `qt_material6`, from `python -X importtime`.
+
+Every run is a fresh interpreter that imports the Qt binding first, as
+applications do, so only the time spent importing the package counts. Run
+from the repository root with the package and a Qt binding installed:
+
+    python benchmarks/importtime.py
+"""
+
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+
+REPEAT = 10
+# Packages worth watching, none should be imported by `import qt_material6`
+HEAVY = [
+    "jinja2",
+    "multiprocessing",
+    "xml.etree.ElementTree",
+    "PySide6.QtUiTools",
+    "PyQt6.uic",
+]
+
+
+def importtime(binding):
+    """Return {module: cumulative microseconds} of one fresh import."""
+    process = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import {binding}.QtWidgets; import qt_material6",
+        ],
+        env=dict(os.environ, QT_QPA_PLATFORM="offscreen"),
+        stderr=subprocess.PIPE,
+        check=True,
+        text=True,
+    )
+
+    modules = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def main():
+    """"""
+    binding = next(
+        binding
+        for binding in ["PySide6", "PyQt6"]
+        if importlib.util.find_spec(binding) is not None
+    )
+
+    runs = [importtime(binding) for _ in range(REPEAT)]
+    total = statistics.median(run["qt_material6"] for run in runs)
+    print(f"import qt_material6 ({binding}): {total / 1000:.1f} ms")
+    for name in HEAVY:
+        if name in runs[0]:
+            print(f"  imports {name}: {runs[0][name] / 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
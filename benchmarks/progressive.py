@@ -0,0 +1,84 @@
+"""Longest stretch the event loop is blocked switching themes, on a visible
+window with hidden tab pages and on hidden dialogs, at once and with
+`progressive=True`.
+
+Run from the repository root with the package and a Qt binding installed:
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/progressive.py
+"""
+
+import time
+
+try:
+    from PySide6 import QtWidgets
+except ImportError:
+    from PyQt6 import QtWidgets
+
+from qt_material6 import apply_stylesheet, build_stylesheet
+
+DIALOGS = 10
+PAGES = 10
+ROWS = 300
+THEMES = ["dark_teal.xml", "dark_blue.xml"]
+
+
+def window():
+    """A window with a few hundred widgets."""
+    widget = QtWidgets.QWidget()
+    layout = QtWidgets.QVBoxLayout(widget)
+    for row in range(ROWS):
+        layout.addWidget(QtWidgets.QPushButton(f"Button {row}"))
+        layout.addWidget(QtWidgets.QLineEdit())
+    return widget
+
+
+def main_window():
+    """A window with tab pages of a few hundred widgets, one shown."""
+    tabs = QtWidgets.QTabWidget()
+    for page in range(PAGES):
+        tabs.addTab(window(), f"Page {page}")
+    return tabs
+
+
+def main():
+    """"""
+    app = QtWidgets.QApplication([])
+    main = main_window()
+    main.show()
+    dialogs = [window() for _ in range(DIALOGS)]
+    for dialog in dialogs:
+        dialog.show()
+        dialog.hide()
+    app.processEvents()
+    # Keep rendering out of the numbers
+    for theme in THEMES:
+        build_stylesheet(theme)
+
+    apply_stylesheet(app, THEMES[0])
+    app.processEvents()
+
+    start = time.perf_counter()
+    apply_stylesheet(app, THEMES[1])
+    app.processEvents()
+    blocked = time.perf_counter() - start
+    print(f"at once:     blocked {blocked * 1000:6.0f} ms")
+
+    # The first one also takes the stylesheet off the application
+    for label, theme in [("progressive", THEMES[0]), ("again", THEMES[1])]:
+        stalls = []
+        start = time.perf_counter()
+        applying = apply_stylesheet(app, theme, progressive=True)
+        stalls.append(time.perf_counter() - start)
+        while applying.running():
+            start = time.perf_counter()
+            app.processEvents()
+            stalls.append(time.perf_counter() - start)
+        print(
+            f"{label + ':':12} blocked {stalls[0] * 1000:6.0f} ms first, "
+            f"{max(stalls[1:]) * 1000:6.0f} ms at most after, "
+            f"{sum(stalls) * 1000:6.0f} ms in total"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Time to rebuild the stylesheet for a density change, every stage run and
+with a `RebuildPlanner` running only the render, and to apply a density
+change built with `build_theme`, which must skip the same stages.
+
+Run from the repository root with the package and a Qt binding installed:
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/rebuild.py
+"""
+
+import time
+
+try:
+    from PySide6 import QtWidgets
+except ImportError:
+    from PyQt6 import QtWidgets
+
+from qt_material6 import (
+    RebuildPlanner,
+    apply_build,
+    build_stylesheet,
+    build_theme,
+    rebuild_stats,
+)
+from qt_material6.plan import ICONS
+
+ROUNDS = 200
+DENSITIES = [str(density) for density in range(-3, 4)]
+
+
+def rebuild(planner):
+    """Milliseconds per build, cycling through the densities."""
+    for density in DENSITIES:
+        build_stylesheet("dark_teal.xml", extra={"density_scale": density})
+    start = time.perf_counter()
+    for round_ in range(ROUNDS):
+        density = DENSITIES[round_ % len(DENSITIES)]
+        build_stylesheet(
+            "dark_teal.xml",
+            extra={"density_scale": density},
+            planner=planner,
+        )
+    return (time.perf_counter() - start) * 1000 / ROUNDS
+
+
+def apply_builds(app):
+    """Milliseconds per `apply_build`, cycling through the densities."""
+    builds = [
+        build_theme("dark_teal.xml", extra={"density_scale": density})
+        for density in DENSITIES
+    ]
+    apply_build(app, builds[-1])
+    rebuild_stats(reset=True)
+    start = time.perf_counter()
+    for round_ in range(ROUNDS):
+        apply_build(app, builds[round_ % len(builds)])
+    elapsed = (time.perf_counter() - start) * 1000 / ROUNDS
+
+    # Only the render depends on the density
+    stats = rebuild_stats()
+    for stage in ("fonts", "palette") + ICONS:
+        assert not stats[stage]["ran"], f"{stage} ran for a density change"
+    return elapsed
+
+
+def main():
+    """"""
+    app = QtWidgets.QApplication([])
+    planner = RebuildPlanner()
+    print(f"every stage: {rebuild(None):6.3f} ms")
+    print(f"planned:     {rebuild(planner):6.3f} ms")
+    print(planner.stats())
+    print(f"apply_build: {apply_builds(app):6.3f} ms")
+    print(rebuild_stats())
+
+
+if __name__ == "__main__":
+    main()
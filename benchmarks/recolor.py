@@ -0,0 +1,83 @@
+"""Compare the single pass `Recolor` engine with the former recoloring.
+
+Run from the repository root with the package and a Qt binding installed:
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/recolor.py
+"""
+
+import os
+import timeit
+
+try:
+    import PySide6.QtCore  # noqa: F401
+except ImportError:
+    import PyQt6.QtCore  # noqa: F401
+
+from qt_material6.resources.generate import load_sources
+from qt_material6.resources.recolor import icon_recolorer
+
+SOURCE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..",
+    "src",
+    "qt_material6",
+    "resources",
+    "source",
+)
+
+FOLDERS = ["#4f5b62", "#1de9b6", "#707070"]
+SECONDARY = "#232629"
+
+
+def replace_color(content, replace, color="#0000ff"):
+    """The former `ResourseGenerator.replace_color`, 14 chained replaces."""
+    colors = [color] + [
+        "".join(list(color)[:i] + ["\\\n"] + list(color)[i:])
+        for i in range(1, 7)
+    ]
+    for c in colors:
+        content = content.replace(c, replace)
+
+    replace = "#ffffff00"
+    color = "#000000"
+    colors = [color] + [
+        "".join(list(color)[:i] + ["\\\n"] + list(color)[i:])
+        for i in range(1, 7)
+    ]
+    for c in colors:
+        content = content.replace(c, replace)
+
+    return content
+
+
+def chained(icons):
+    """"""
+    return [
+        replace_color(replace_color(content, color), SECONDARY, "#ff0000")
+        for color in FOLDERS
+        for content in icons
+    ]
+
+
+def single_pass(icons):
+    """"""
+    output = []
+    for color in FOLDERS:
+        engine = icon_recolorer(color, SECONDARY)
+        output.extend(engine(content) for content in icons)
+    return output
+
+
+def main():
+    """"""
+    icons = list(load_sources(SOURCE)[1].values())
+    assert chained(icons) == single_pass(icons)
+
+    for name, function in [("chained", chained), ("single pass", single_pass)]:
+        runs = timeit.repeat(lambda: function(icons), number=20, repeat=5)
+        best = min(runs) / 20 * 1000
+        print(f"{name:>12}: {best:.2f} ms per theme ({len(icons)} icons)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Throughput of the seed theme generator, batched and one at a time.
+
+Needs NumPy. Run from the repository root with the package installed:
+
+    python benchmarks/seed.py
+"""
+
+import random
+import time
+
+from qt_material6 import seed_theme, seed_themes
+
+BATCH = 10000
+SINGLE = 1000
+
+
+def main():
+    """"""
+    rng = random.Random(0)
+    seeds = [f"#{rng.getrandbits(24):06x}" for _ in range(BATCH)]
+    light = [rng.random() > 0.5 for _ in range(BATCH)]
+
+    start = time.perf_counter()
+    seed_themes(seeds, light=light)
+    batched = (time.perf_counter() - start) * 1e6 / BATCH
+
+    start = time.perf_counter()
+    for seed, is_light in zip(seeds[:SINGLE], light):
+        seed_theme(seed, light=is_light)
+    single = (time.perf_counter() - start) * 1e6 / SINGLE
+
+    print(f"batch of {BATCH}: {batched:8.1f} us per theme")
+    print(f"one at a time:  {single:8.1f} us per theme")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Files written and disk used exporting every bundled theme.
+
+Every theme is exported to its own folder with `export_theme`, once
+writing every icon and once with `store_icons=True`, linking them from the
+content addressed store. Run from the repository root with the package
+and a Qt binding installed:
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/store.py
+"""
+
+import os
+import tempfile
+import time
+
+try:
+    import PySide6.QtCore  # noqa: F401
+except ImportError:
+    import PyQt6.QtCore  # noqa: F401
+
+from qt_material6 import export_theme, list_themes
+from qt_material6.resources import disk_usage, generate, store_stats
+
+
+def export_all(folder, store):
+    """Export every theme into `folder`, return the stats and seconds."""
+    generate.STORE_PATH = os.path.join(folder, "store")
+    store_stats(reset=True)
+    start = time.perf_counter()
+    for theme in list_themes():
+        name = os.path.splitext(theme)[0]
+        export_theme(
+            theme,
+            qss=os.path.join(folder, f"{name}.qss"),
+            invert_secondary=theme.startswith("light"),
+            output=os.path.join(folder, name),
+            store_icons=store,
+        )
+    return store_stats(), time.perf_counter() - start
+
+
+def main():
+    """"""
+    for store in [False, True]:
+        with tempfile.TemporaryDirectory() as folder:
+            stats, elapsed = export_all(folder, store)
+            usage = disk_usage(folder) / 1024
+            print(
+                f"store={store!s:<5} written {stats['written']:>5}  "
+                f"linked {stats['linked']:>5}  copied {stats['copied']:>5}  "
+                f"disk {usage:8.0f} KiB  {elapsed * 1000:6.0f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
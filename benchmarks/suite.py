@@ -0,0 +1,377 @@
+"""Microbenchmarks of the theming pipeline, per theme and Qt binding.
+
+Run from the repository root with the package and the Qt bindings
+installed, every binding found is measured in its own process:
+
+    python benchmarks/suite.py
+    python benchmarks/suite.py --binding PySide6 --theme dark_teal.xml
+    python benchmarks/suite.py --theme all --save baseline.json
+    python benchmarks/suite.py --compare baseline.json
+
+The workers run offscreen with HOME in a temporary folder, so no icon or
+template cache of the user is read or written. Times are the median and
+best of `--repeat` runs, in microseconds. With `--compare` the exit status
+is 1 when a median got slower than `--threshold` times the saved one.
+"""
+
+import argparse
+import importlib
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BINDINGS = ["PySide6", "PyQt6"]
+THEMES = ["dark_teal.xml", "light_blue.xml"]
+REPEAT = 20
+# Calls per run of the benchmarks too fast to time one call at a time
+NUMBER = 1000
+
+SOURCE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..",
+    "src",
+    "qt_material6",
+    "resources",
+    "source",
+)
+
+
+def measure(stmt, setup=None, repeat=REPEAT, number=1):
+    """Microseconds per call of `stmt` for `repeat` runs.
+
+    `setup` is called, untimed, before every run.
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            stmt()
+        timings.append((time.perf_counter() - start) * 1e6 / number)
+    return {"median": statistics.median(timings), "best": min(timings)}
+
+
+########################################################################
+class Pipeline:
+    """The benchmarks of one worker process, bound to its Qt binding."""
+
+    # ----------------------------------------------------------------------
+    def __init__(self, binding, folder):
+        """Constructor"""
+        widgets = importlib.import_module(f"{binding}.QtWidgets")
+        self.app = widgets.QApplication.instance()
+        if self.app is None:
+            self.app = widgets.QApplication([])
+
+        # The package must be imported after the binding
+        import qt_material6
+        from qt_material6.resources import generate
+
+        self.qt_material6 = qt_material6
+        self.generate = generate
+        self.folder = folder
+        self.window = self.small_window(widgets)
+        self.benchmarks = [
+            ("get_theme", self.get_theme),
+            ("generate", self.generate_icons),
+            ("generate cached", self.generate_cached),
+            ("replace_color", self.replace_color),
+            ("density", self.density),
+            ("opacity", self.opacity),
+            ("build_stylesheet cold", self.build_cold),
+            ("build_stylesheet warm", self.build_warm),
+            ("export_theme", self.export_theme),
+            ("apply_stylesheet", self.apply_stylesheet),
+        ]
+
+    # ----------------------------------------------------------------------
+    def small_window(self, widgets):
+        """A shown main window with one of the common widgets each."""
+        window = widgets.QMainWindow()
+        central = widgets.QWidget(window)
+        layout = widgets.QVBoxLayout(central)
+        for widget in [
+            widgets.QPushButton("Button"),
+            widgets.QLineEdit("Line edit"),
+            widgets.QComboBox(),
+            widgets.QCheckBox("Check box"),
+            widgets.QRadioButton("Radio button"),
+            widgets.QSpinBox(),
+            widgets.QSlider(),
+            widgets.QProgressBar(),
+            widgets.QTabWidget(),
+            widgets.QTableWidget(8, 4),
+        ]:
+            layout.addWidget(widget)
+        window.setCentralWidget(central)
+        window.show()
+        self.app.processEvents()
+        return window
+
+    # ----------------------------------------------------------------------
+    def run(self, themes, repeat):
+        """Return {benchmark: {theme: timings}}."""
+        results = {}
+        for theme in themes:
+            invert = theme.startswith("light")
+            for name, benchmark in self.benchmarks:
+                results.setdefault(name, {})[theme] = benchmark(
+                    theme, invert, repeat
+                )
+        return results
+
+    # ----------------------------------------------------------------------
+    def cold(self):
+        """Drop every in-process and on-disk cache of the pipeline."""
+        self.generate.CACHE_PATH = tempfile.mkdtemp(
+            prefix="cache-", dir=self.folder
+        )
+        self.generate.STORE_PATH = tempfile.mkdtemp(
+            prefix="store-", dir=self.folder
+        )
+        self.generate.icon_cache_clear()
+        self.qt_material6.stylesheet_cache_clear()
+        self.qt_material6.template_cache_clear()
+
+    # ----------------------------------------------------------------------
+    def generator(self, theme, invert, cache=False):
+        """"""
+        colors = self.qt_material6.get_theme(theme, invert)
+        return self.generate.ResourseGenerator(
+            primary=colors["primaryColor"],
+            secondary=colors["secondaryColor"],
+            disabled=colors["secondaryLightColor"],
+            source=SOURCE,
+            parent=os.path.join(self.folder, "theme"),
+            cache=cache,
+        )
+
+    # ----------------------------------------------------------------------
+    def get_theme(self, theme, invert, repeat):
+        """"""
+        return measure(
+            lambda: self.qt_material6.get_theme(theme, invert), repeat=repeat
+        )
+
+    # ----------------------------------------------------------------------
+    def generate_icons(self, theme, invert, repeat):
+        """Every icon recolored and written."""
+        generator = self.generator(theme, invert)
+        return measure(generator.generate, repeat=repeat)
+
+    # ----------------------------------------------------------------------
+    def generate_cached(self, theme, invert, repeat):
+        """Icons found in the cache of an earlier run."""
+        self.generator(theme, invert, cache=True).generate()
+        return measure(
+            lambda: self.generator(theme, invert, cache=True).generate(),
+            repeat=repeat,
+        )
+
+    # ----------------------------------------------------------------------
+    def replace_color(self, theme, invert, repeat):
+        """Every source icon recolored with the primary color."""
+        generator = self.generator(theme, invert)
+        color = self.qt_material6.get_theme(theme, invert)["primaryColor"]
+        icons = list(self.generate.load_sources(SOURCE)[1].values())
+
+        def recolor():
+            for content in icons:
+                generator.replace_color(content, color)
+
+        return measure(recolor, repeat=repeat)
+
+    # ----------------------------------------------------------------------
+    def density(self, theme, invert, repeat):
+        """"""
+        return measure(
+            lambda: self.qt_material6.density("16px", "-1", border=1),
+            repeat=repeat,
+            number=NUMBER,
+        )
+
+    # ----------------------------------------------------------------------
+    def opacity(self, theme, invert, repeat):
+        """"""
+        color = self.qt_material6.get_theme(theme, invert)["primaryColor"]
+        return measure(
+            lambda: self.qt_material6.opacity(color, 0.2),
+            repeat=repeat,
+            number=NUMBER,
+        )
+
+    # ----------------------------------------------------------------------
+    def build_cold(self, theme, invert, repeat):
+        """"""
+        return measure(
+            lambda: self.qt_material6.build_stylesheet(theme, invert),
+            setup=self.cold,
+            repeat=repeat,
+        )
+
+    # ----------------------------------------------------------------------
+    def build_warm(self, theme, invert, repeat):
+        """"""
+        self.qt_material6.build_stylesheet(theme, invert)
+        return measure(
+            lambda: self.qt_material6.build_stylesheet(theme, invert),
+            repeat=repeat,
+        )
+
+    # ----------------------------------------------------------------------
+    def export_theme(self, theme, invert, repeat):
+        """"""
+        return measure(
+            lambda: self.qt_material6.export_theme(
+                theme,
+                qss=os.path.join(self.folder, "export.qss"),
+                rcc=os.path.join(self.folder, "export.qrc"),
+                invert_secondary=invert,
+                output=os.path.join(self.folder, "export"),
+            ),
+            repeat=repeat,
+        )
+
+    # ----------------------------------------------------------------------
+    def apply_stylesheet(self, theme, invert, repeat):
+        """Warm caches, the window is restyled and repolished each run."""
+
+        def clear():
+            self.window.setStyleSheet("")
+            self.app.processEvents()
+
+        def apply():
+            self.qt_material6.apply_stylesheet(
+                self.window, theme, invert_secondary=invert
+            )
+            self.app.processEvents()
+
+        apply()
+        return measure(apply, setup=clear, repeat=repeat)
+
+
+def worker(binding, themes, repeat):
+    """Run the benchmarks in this process, print the results as JSON."""
+    with tempfile.TemporaryDirectory() as folder:
+        pipeline = Pipeline(binding, folder)
+        if themes == ["all"]:
+            themes = pipeline.qt_material6.list_themes()
+        results = pipeline.run(themes, repeat)
+    json.dump(results, sys.stdout)
+
+
+def spawn(binding, themes, repeat):
+    """Run the benchmarks of `binding` in a fresh, offscreen process."""
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, QT_QPA_PLATFORM="offscreen", HOME=home)
+        command = [sys.executable, os.path.abspath(__file__)]
+        command += ["--worker", binding, "--repeat", str(repeat)]
+        for theme in themes:
+            command += ["--theme", theme]
+        process = subprocess.run(
+            command, env=env, stdout=subprocess.PIPE, check=True, text=True
+        )
+    return json.loads(process.stdout)
+
+
+def report(results, baseline=None, threshold=None):
+    """Print the medians and return the regressions against `baseline`."""
+    bindings = list(results)
+    rows = sorted(
+        {
+            (name, theme)
+            for binding in bindings
+            for name, themes in results[binding].items()
+            for theme in themes
+        },
+        key=lambda row: (row[1], row[0]),
+    )
+
+    print(
+        f"{'benchmark':<24}{'theme':<28}"
+        + "".join(f"{binding:>14}" for binding in bindings)
+    )
+    regressions = []
+    for name, theme in rows:
+        line = f"{name:<24}{theme:<28}"
+        for binding in bindings:
+            timing = results[binding].get(name, {}).get(theme)
+            if timing is None:
+                line += f"{'-':>14}"
+                continue
+            mark = " "
+            saved = (baseline or {}).get(binding, {}).get(name, {}).get(theme)
+            if saved and timing["median"] > saved["median"] * threshold:
+                regressions.append((binding, name, theme))
+                mark = "!"
+            line += f"{timing['median']:>13.1f}{mark}"
+        print(line)
+    return regressions
+
+
+def main():
+    """"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--binding",
+        action="append",
+        choices=BINDINGS,
+        help="Qt binding to measure, every installed one by default",
+    )
+    parser.add_argument(
+        "--theme",
+        action="append",
+        help=f"theme to measure, 'all' for every bundled one ({THEMES})",
+    )
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file from an earlier --save")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    parser.add_argument("--worker", choices=BINDINGS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    themes = args.theme or THEMES
+
+    if args.worker:
+        worker(args.worker, themes, args.repeat)
+        return
+
+    bindings = [
+        binding
+        for binding in args.binding or BINDINGS
+        if importlib.util.find_spec(binding) is not None
+    ]
+    if not bindings:
+        sys.exit(f"None of {', '.join(args.binding or BINDINGS)} is installed.")
+
+    results = {}
+    for binding in bindings:
+        print(f"Measuring {binding}...", file=sys.stderr)
+        results[binding] = spawn(binding, themes, args.repeat)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    regressions = report(results, baseline, args.threshold)
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if regressions:
+        print(
+            f"{len(regressions)} benchmarks are more than {args.threshold}x "
+            "slower than the saved ones.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
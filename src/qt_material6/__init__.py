@@ -2,14 +2,46 @@ import logging
 import os
 import platform
 import sys
+from collections import namedtuple
 from pathlib import Path
-from xml.dom.minidom import parse
 
-import jinja2
-from qt_style_tools import QtStyleTools
-from resources import ResourseGenerator
+from . import instrument
+from .fonts import (
+    STYLES,
+    pending_fonts,
+    read_fonts,
+    register_fonts,
+    registered_fonts,
+)
+from .instrument import (
+    Timings,
+    add_timing_callback,
+    capture_timings,
+    remove_timing_callback,
+    set_slow_threshold,
+)
+from .plan import ICONS, RebuildPlanner, rebuild_planner, rebuild_stats
+from .qss import IMPLIED, count_rules, minify_stylesheet, prune_stylesheet
+from .registry import THEME_REGISTRY, ThemeRecord, ThemeRegistry
+from .seed import seed_theme, seed_themes
+from .template import (
+    TEMPLATE_FILE,
+    disable_bytecode_cache,
+    enable_bytecode_cache,
+    get_template,
+    render_template,
+    set_stylesheet_cache_size,
+    stylesheet_cache_clear,
+    stylesheet_cache_info,
+    template_cache_clear,
+    template_cache_info,
+    template_dependencies,
+    template_sections,
+)
+from .theme import Theme
 
 _GUI = True
+_UNBOUND = False
 
 if "PySide6" in sys.modules:
     from PySide6 import QtCore, QtGui, QtWidgets
@@ -24,18 +56,29 @@ elif "PyQt5" in sys.modules:
     logging.error("qt_material6 has ended support for PyQt5!")
 else:
     _GUI = False
-    logging.error("qt_material6 must be imported after PySide6 or PyQt6!")
-
-__widget = QtGui.QAction()
-_FEATURE = callable(getattr(__widget, "set_menu", None))
-del __widget
-
-TEMPLATE_FILE = (
-    Path(__file__).absolute().parent.joinpath("material.css.template")
+    # Reported once Qt is needed, see `_no_binding`, as the theme files and
+    # the stylesheet rendering work without it.
+    _UNBOUND = True
+
+if not _GUI:
+    QtCore = QtGui = QtWidgets = None
+
+# The snake_case feature renames the methods of the classes themselves, so
+# no Qt object has to be created to detect it.
+_FEATURE = _GUI and callable(getattr(QtGui.QAction, "set_menu", None))
+
+# Dynamic property of every styled object, see `set_stylesheet`
+FINGERPRINT = "qt_material6_fingerprint"
+# Calls of `set_stylesheet` since the start or `apply_stats(reset=True)`
+_APPLIES = {"applied": 0, "skipped": 0}
+
+# The result of `build_theme`, everything `apply_build` needs, and the
+# inputs of its `RebuildPlan`.
+ThemeBuild = namedtuple(
+    "ThemeBuild",
+    ["theme", "stylesheet", "resources", "name", "inputs"],
+    defaults=["", None],
 )
-# TEMPLATE_FILE = os.path.join(
-#     os.path.dirname(os.path.abspath(__file__)), "material.css.template"
-# )
 
 
 def export_theme(
@@ -46,8 +89,19 @@ def export_theme(
     extra=None,
     output="theme",
     prefix="icon:/",
+    rc_module=None,
+    minify=False,
+    store_icons=False,
 ):
-    """"""
+    """Write the stylesheet of `theme` to `qss` and its icons to `output`.
+
+    `rcc` is a compiled resource bundle with the stylesheet and every icon,
+    or the listing of them for Qt's `rcc` tool when it ends with `.qrc`.
+    `rc_module` is a Python module registering the same bundle on import.
+    `minify` drops the comments and spacing of the stylesheet.
+    `store_icons` hardlinks the icons from the shared icon store instead of
+    writing a copy of each, see `ResourseGenerator.store`.
+    """
     logging.info("Welcome to 'export_theme' function, adventurer!")
     logging.debug("Was given the follow argument values:")
     logging.debug(f"{theme=}")
@@ -57,13 +111,22 @@ def export_theme(
     logging.debug(f"{extra=}")
     logging.debug(f"{output=}")
     logging.debug(f"{prefix=}")
+    logging.debug(f"{rc_module=}")
+    logging.debug(f"{minify=}")
+    logging.debug(f"{store_icons=}")
     if extra is None:
         extra = {}
     if not os.path.isabs(output) and not output.startswith("."):
         output = f".{output}"
 
     stylesheet = build_stylesheet(
-        theme, invert_secondary, extra, output, export=True
+        theme,
+        invert_secondary,
+        extra,
+        output,
+        export=True,
+        minify=minify,
+        store_icons=store_icons,
     )
 
     if output.startswith("."):
@@ -72,7 +135,18 @@ def export_theme(
     with open(qss, "w") as file:
         file.writelines(stylesheet.replace("icon:/", prefix))
 
-    if rcc:
+    if (rcc and not rcc.endswith(".qrc")) or rc_module:
+        from .resources.rcc import compile_rcc, rcc_module
+
+        bundle = compile_rcc(export_resources(stylesheet, qss, output, prefix))
+        if rcc and not rcc.endswith(".qrc"):
+            with open(rcc, "wb") as file:
+                file.write(bundle)
+        if rc_module:
+            with open(rc_module, "w") as file:
+                file.write(rcc_module(bundle))
+
+    if rcc and rcc.endswith(".qrc"):
         with open(rcc, "w") as file:
             file.write("<RCC>\n")
             file.write(f'  <qresource prefix="{prefix[:-2]}">\n')
@@ -97,6 +171,28 @@ def export_theme(
             file.write("</RCC>\n")
 
 
+def export_resources(stylesheet, qss_file, output="theme", prefix="icon:/"):
+    """Map the resource paths of an exported theme to their bytes.
+
+    The icons of `output` go under the name of `prefix`, `:/icon/primary`
+    for `icon:/`, and the stylesheet under `:/file`, as in the `.qrc`
+    listing. Adding `:/icon` as the `icon` search path is then enough.
+    """
+    root = prefix.strip(":/")
+    qss = stylesheet.replace("icon:/", prefix)
+    files = {f"file/{os.path.basename(qss_file)}": qss.encode()}
+    for subfolder in sorted(os.listdir(output)):
+        folder = os.path.join(output, subfolder)
+        if not os.path.isdir(folder):
+            continue
+        for filename in sorted(os.listdir(folder)):
+            if filename.endswith(".svg"):
+                with open(os.path.join(folder, filename), "rb") as file:
+                    files[f"{root}/{subfolder}/{filename}"] = file.read()
+    return files
+
+
+@instrument.recorded
 def build_stylesheet(
     theme="",
     invert_secondary=False,
@@ -104,33 +200,223 @@ def build_stylesheet(
     parent="theme",
     template=TEMPLATE_FILE,
     export=False,
+    in_memory_icons=False,
+    minify=False,
+    palette=True,
+    planner=None,
+    cache_icons=None,
+    store_icons=None,
 ):
-    """"""
+    """Render the stylesheet of `theme`, and set up its fonts and icons.
+
+    With a `RebuildPlanner` only the stages whose inputs changed since its
+    last build are run, see `rebuild_stats`. The icons are taken from the
+    content addressed cache with `cache_icons`, by default when `parent`
+    is not given, see `set_icons_theme`, and an export links them from the
+    icon store with `store_icons`.
+    """
+    return _build_stylesheet(
+        theme,
+        invert_secondary,
+        extra,
+        parent,
+        template,
+        export,
+        in_memory_icons,
+        minify,
+        palette,
+        planner,
+        cache_icons,
+        store_icons,
+    )[1]
+
+
+def _build_stylesheet(
+    theme,
+    invert_secondary,
+    extra,
+    parent,
+    template=TEMPLATE_FILE,
+    export=False,
+    in_memory_icons=False,
+    minify=False,
+    palette=True,
+    planner=None,
+    cache_icons=None,
+    store_icons=None,
+):
+    """Return the variables of `theme` and its stylesheet, see
+    `build_stylesheet`, the stylesheet is None if it failed.
+    """
+    with instrument.phase("get_theme"):
+        theme = prepare_theme(theme, invert_secondary, extra)
+    if theme is None:
+        return None, None
+
+    cache_icons = _cache_icons(parent, cache_icons)
+    plan = None
+    if planner is not None and not export:
+        plan = planner.plan(
+            theme,
+            parent,
+            template,
+            in_memory_icons=in_memory_icons,
+            minify=minify,
+            cache_icons=cache_icons,
+        )
 
-    if extra is None:
-        extra = {}
-    if not export:
-        try:
-            add_fonts()
-        except Exception as e:
-            logging.warning(e)
+    if not export and (plan is None or "fonts" in plan):
+        with instrument.phase("add_fonts"):
+            try:
+                add_fonts(theme["font_family"])
+            except Exception as e:
+                logging.warning(e)
+
+    if export:
+        # Written for the export only, the icons in use stay registered
+        with instrument.phase("generate_icons"):
+            generate_icons(theme, parent=parent, store=store_icons)
+    elif plan is None or plan.icons:
+        with instrument.phase("set_icons_theme"):
+            set_icons_theme(
+                theme,
+                parent=parent,
+                cache=cache_icons,
+                memory=in_memory_icons,
+            )
 
-    theme = get_theme(theme, invert_secondary)
-    if theme is None:
+    if plan is None or "render" in plan:
+        with instrument.phase("render"):
+            stylesheet = render_stylesheet(theme, template)
+        if stylesheet is None:
+            return theme, None
+
+        if minify:
+            with instrument.phase("minify"):
+                stylesheet = minify_stylesheet(stylesheet)
+    else:
+        stylesheet = plan.stylesheet
+
+    if palette and (plan is None or "palette" in plan):
+        with instrument.phase("palette"):
+            set_palette(theme)
+
+    if plan is not None:
+        planner.done(plan, stylesheet)
+    return theme, stylesheet
+
+
+@instrument.recorded
+def build_theme(
+    theme="",
+    invert_secondary=False,
+    extra=None,
+    parent="theme",
+    template=TEMPLATE_FILE,
+    in_memory_icons=False,
+    cancelled=None,
+    minify=False,
+    cache_icons=None,
+):
+    """Run the parts of `build_stylesheet` that do not touch the GUI.
+
+    Safe to call from any thread, the returned `ThemeBuild` is applied on
+    the GUI thread with `apply_build`. `cancelled` is polled between the
+    stages, the build stops and returns None once it returns True.
+    """
+    if cancelled is None:
+        cancelled = bool
+
+    name = theme_name(theme)
+    with instrument.phase("get_theme"):
+        theme = prepare_theme(theme, invert_secondary, extra)
+    if theme is None or cancelled():
         return None
 
-    set_icons_theme(theme, parent=parent)
+    cache_icons = _cache_icons(parent, cache_icons)
+    inputs = (
+        rebuild_planner()
+        .plan(
+            theme,
+            parent,
+            template,
+            in_memory_icons=in_memory_icons,
+            minify=minify,
+            cache_icons=cache_icons,
+        )
+        .inputs
+    )
 
-    # Render custom template
-    if os.path.exists(template):
-        parent, template = os.path.split(template)
-        loader = jinja2.FileSystemLoader(parent)
-        env = jinja2.Environment(autoescape=True, loader=loader)
-        env.filters["opacity"] = opacity
-        env.filters["density"] = density
-        stylesheet = env.get_template(template)
-    else:
-        logging.warning("Failed to find template!")
+    # Generated anyway, the icon sets are cached and the stages to run are
+    # only known once applied
+    with instrument.phase("generate_icons"):
+        resources = generate_icons(
+            theme, parent=parent, cache=cache_icons, memory=in_memory_icons
+        )
+    if cancelled():
+        return None
+
+    with instrument.phase("render"):
+        stylesheet = render_stylesheet(theme, template)
+    if stylesheet is None or cancelled():
+        return None
+
+    if minify:
+        with instrument.phase("minify"):
+            stylesheet = minify_stylesheet(stylesheet)
+
+    return ThemeBuild(theme, stylesheet, resources, name, inputs)
+
+
+@instrument.recorded
+def apply_build(app, build, fonts=True):
+    """Apply a `ThemeBuild` to `app`, must run on the GUI thread.
+
+    Like `apply_stylesheet`, only the stages whose inputs changed since
+    the last apply are run, see `rebuild_stats`.
+    """
+    planner = plan = None
+    if build.inputs is not None:
+        inputs = build.inputs
+        if not fonts:
+            # Still to be added by the next apply with fonts
+            inputs = {
+                stage: value
+                for stage, value in inputs.items()
+                if stage != "fonts"
+            }
+        planner = rebuild_planner()
+        plan = planner.compare(inputs)
+
+    if fonts and (plan is None or "fonts" in plan):
+        with instrument.phase("add_fonts"):
+            try:
+                add_fonts(build.theme["font_family"])
+            except Exception as e:
+                logging.warning(e)
+
+    if plan is None or plan.icons:
+        with instrument.phase("register_icons"):
+            register_icons(build.resources)
+
+    if plan is None or "palette" in plan:
+        with instrument.phase("palette"):
+            set_palette(build.theme)
+
+    _reset_windows(app)
+    set_stylesheet(app, build.stylesheet, build.theme, palette=False)
+
+    if plan is not None:
+        planner.done(plan, build.stylesheet)
+
+    with instrument.phase("state"):
+        _theme_state().update(build.name, build.theme)
+
+
+def prepare_theme(theme="", invert_secondary=False, extra=None):
+    """Return the template variables of `theme`, or None if not found."""
+    theme = get_theme(theme, invert_secondary)
+    if theme is None:
         return None
 
     theme.setdefault("icon", None)
@@ -141,27 +427,21 @@ def build_stylesheet(
     theme.setdefault("density_scale", "0")
     theme.setdefault("button_shape", "default")
 
-    theme.update(extra)
+    if extra:
+        theme.update(extra)
 
-    if _GUI:
-        default_palette = QtGui.QGuiApplication.palette()
-        color = QtGui.QColor(
-            *[int(theme["primaryColor"][i : i + 2], 16) for i in range(1, 6, 2)]
-            + [92]
-        )
+    # The QMenu overrides are flattened into the variables of the template
+    if isinstance(theme.get("QMenu"), dict):
+        for k, value in theme["QMenu"].items():
+            theme[f"qmenu_{k}"] = value
+        theme["QMenu"] = True
+
+    return theme
 
-        if _FEATURE:
-            default_palette.set_color(QtGui.QPalette.ColorRole.Text, color)
-            QtGui.QGuiApplication.set_palette(default_palette)
-            if hasattr(QtGui.QPalette, "PlaceholderText"):  # pyside6
-                default_palette.set_color(QtGui.QPalette.PlaceholderText, color)
-        else:
-            default_palette.setColor(QtGui.QPalette.ColorRole.Text, color)
-            QtGui.QGuiApplication.setPalette(default_palette)
-            if hasattr(QtGui.QPalette, "PlaceholderText"):  # pyside6
-                default_palette.setColor(QtGui.QPalette.PlaceholderText, color)
 
-    environ = {
+def render_flags():
+    """The platform and binding flags the template is rendered with."""
+    return {
         "linux": platform.system() == "Linux",
         "windows": platform.system() == "Windows",
         "darwin": platform.system() == "Darwin",
@@ -169,52 +449,92 @@ def build_stylesheet(
         "pyside6": "PySide6" in sys.modules,
     }
 
+
+def render_stylesheet(theme, template=TEMPLATE_FILE):
+    """Render `template` for the variables from `prepare_theme`."""
+    environ = render_flags()
     environ.update(theme)
-    return stylesheet.render(environ)
+
+    # Render custom template, the same inputs are served from a cache
+    stylesheet = render_template(
+        environ, template, {"opacity": opacity, "density": density}
+    )
+    if stylesheet is None:
+        logging.warning("Failed to find template!")
+    else:
+        instrument.count("rendered", len(stylesheet))
+    return stylesheet
 
 
-def get_theme(theme_name, invert_secondary=False):
-    if theme_name in [
-        "default_dark.xml",
-        "default_dark",
-    ]:
-        theme = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)),
-            "themes",
-            "dark_teal.xml",
-            # 'light_cyan_500.xml',
-        )
-    elif theme_name in [
-        "default_light.xml",
-        "default_light",
-        "default.xml",
-        "default",
-    ]:
-        invert_secondary = True
-        theme = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)),
-            "themes",
-            "light_cyan_500.xml",
-        )
-    elif not os.path.exists(theme_name):
-        theme = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)), "themes", theme_name
-        )
+def _no_binding():
+    """Log, on the first use of Qt, that no binding was imported."""
+    global _UNBOUND
+
+    if _UNBOUND:
+        _UNBOUND = False
+        logging.error("qt_material6 must be imported after PySide6 or PyQt6!")
+
+
+def set_palette(theme):
+    """Tint the placeholder text of the application palette."""
+    if not _GUI:
+        _no_binding()
+        return
+    rebuild_planner().forget("palette")
+
+    default_palette = QtGui.QGuiApplication.palette()
+    color = QtGui.QColor(
+        *[int(theme["primaryColor"][i : i + 2], 16) for i in range(1, 6, 2)]
+        + [92]
+    )
+
+    if _FEATURE:
+        default_palette.set_color(QtGui.QPalette.ColorRole.Text, color)
+        QtGui.QGuiApplication.set_palette(default_palette)
+        if hasattr(QtGui.QPalette, "PlaceholderText"):  # pyside6
+            default_palette.set_color(QtGui.QPalette.PlaceholderText, color)
     else:
-        theme = theme_name
+        default_palette.setColor(QtGui.QPalette.ColorRole.Text, color)
+        QtGui.QGuiApplication.setPalette(default_palette)
+        if hasattr(QtGui.QPalette, "PlaceholderText"):  # pyside6
+            default_palette.setColor(QtGui.QPalette.PlaceholderText, color)
 
-    if not os.path.exists(theme):
-        logging.warning(f"{theme} does not exist!")
-        return None
 
-    document = parse(theme)
-    theme = {
-        child.getAttribute("name"): child.firstChild.nodeValue
-        for child in document.getElementsByTagName("color")
-    }
+def get_theme(theme_name, invert_secondary=False):
+    """Return the colors of a `Theme`, theme name or file, or mapping."""
+    if isinstance(theme_name, dict):
+        theme_name = Theme.from_dict(theme_name)
+
+    if isinstance(theme_name, Theme):
+        invert_secondary = invert_secondary or theme_name.invert_secondary
+        theme = dict(theme_name.colors)
+        theme_name = theme_name.name
+    else:
+        if theme_name in [
+            "default_dark.xml",
+            "default_dark",
+        ]:
+            record = THEME_REGISTRY.get("dark_teal.xml")
+        elif theme_name in [
+            "default_light.xml",
+            "default_light",
+            "default.xml",
+            "default",
+        ]:
+            invert_secondary = True
+            record = THEME_REGISTRY.get("light_cyan_500.xml")
+        else:
+            # A theme file in the working directory wins over a bundled
+            # theme of the same name
+            record = THEME_REGISTRY.load(theme_name)
+            if record is None:
+                record = THEME_REGISTRY.get(theme_name)
 
-    for k in theme:
-        os.environ[str(k)] = theme[k]
+        if record is None:
+            logging.warning(f"{theme_name} does not exist!")
+            return None
+
+        theme = record.as_dict()
 
     if invert_secondary:
         (
@@ -227,40 +547,46 @@ def get_theme(theme_name, invert_secondary=False):
             theme["secondaryLightColor"],
         )
 
-    for color in [
-        "primaryColor",
-        "primaryLightColor",
-        "secondaryColor",
-        "secondaryLightColor",
-        "secondaryDarkColor",
-        "primaryTextColor",
-        "secondaryTextColor",
-    ]:
-        os.environ[f"QTMATERIAL_{color.upper()}"] = theme[color]
-    os.environ["QTMATERIAL_THEME"] = theme_name
-
     return theme
 
 
-def add_fonts():
-    """"""
-    fonts_path = os.path.join(os.path.dirname(__file__), "fonts")
+def theme_name(theme):
+    """Name of a `Theme`, theme name or file, `QTMATERIAL_THEME` of it."""
+    if isinstance(theme, Theme):
+        return theme.name
+    if isinstance(theme, dict):
+        return ""
+    return str(theme)
 
-    for font_dir in ["roboto"]:
-        for font in filter(
-            lambda s: s.endswith(".ttf"),
-            os.listdir(os.path.join(fonts_path, font_dir)),
-        ):
-            if _FEATURE:
-                QtGui.QFontDatabase.add_application_font(
-                    os.path.join(fonts_path, font_dir, font)
-                )
-            else:
-                QtGui.QFontDatabase.addApplicationFont(
-                    os.path.join(fonts_path, font_dir, font)
-                )
 
+def add_fonts(font_family="Roboto", styles=STYLES, data=None):
+    """Register the bundled fonts of `font_family`, once per process.
+
+    Only the `styles` the template uses are registered, every style with
+    None. Fonts are registered by path, which keeps no copy of them in
+    memory; with `data`, the bytes read ahead by `read_fonts` off the GUI
+    thread, they are registered from memory instead.
+    """
+    if not _GUI:
+        _no_binding()
+        return
 
+    if data is None:
+        data = {path: path for path in pending_fonts(font_family, styles)}
+        if _FEATURE:
+            add = QtGui.QFontDatabase.add_application_font
+        else:
+            add = QtGui.QFontDatabase.addApplicationFont
+    elif _FEATURE:
+        add = QtGui.QFontDatabase.add_application_font_from_data
+    else:
+        add = QtGui.QFontDatabase.addApplicationFontFromData
+
+    if data:
+        register_fonts(data, add)
+
+
+@instrument.recorded
 def apply_stylesheet(
     app,
     theme="",
@@ -270,8 +596,18 @@ def apply_stylesheet(
     extra=None,
     parent="theme",
     css_file=None,
+    in_memory_icons=False,
+    widgets=None,
+    minify=False,
+    progressive=False,
+    cache_icons=None,
 ):
-    """"""
+    """Style `app`, see the README for the arguments.
+
+    With `progressive` and a QApplication, the stylesheet is set on its
+    top-level windows over the next event loop iterations, the visible
+    ones first, and the `ProgressiveApply` doing it returned.
+    """
     if extra is None:
         extra = {}
     if style:
@@ -285,27 +621,110 @@ def apply_stylesheet(
             logging.error(f"The style '{style}' does not exist.")
             pass
 
-    if "QMenu" in extra:
-        for k in extra["QMenu"]:
-            extra[f"qmenu_{k}"] = extra["QMenu"][k]
-        extra["QMenu"] = True
-
-    stylesheet = build_stylesheet(theme, invert_secondary, extra, parent)
+    # Timed as the `build_stylesheet` it stands for, the variables it
+    # resolved are the ones the state and the css file are formatted with
+    with instrument.record("build_stylesheet"):
+        colors, stylesheet = _build_stylesheet(
+            theme,
+            invert_secondary,
+            extra,
+            parent,
+            in_memory_icons=in_memory_icons,
+            minify=minify,
+            planner=rebuild_planner(),
+            cache_icons=cache_icons,
+        )
     if stylesheet is None:
-        return
+        return None
+
+    # Only keep the rules that can match the widgets in use
+    if widgets is not None:
+        with instrument.phase("prune"):
+            stylesheet = prune_stylesheet(stylesheet, widget_classes(widgets))
 
     if save_as:
         with open(save_as, "w") as file:
             file.writelines(stylesheet)
 
+    from .state import theme_environ
+
+    name = theme_name(theme)
     if css_file and os.path.exists(css_file):
+        # One mapping, the theme variables may be exported to the
+        # environment too and override it
         with open(css_file) as file:
-            stylesheet += file.read().format(**os.environ)
+            stylesheet += file.read().format(
+                **{**os.environ, **theme_environ(name, colors)}
+            )
+
+    applying = None
+    if progressive and isinstance(app, QtWidgets.QApplication):
+        from .progressive import ProgressiveApply
+
+        applying = ProgressiveApply(stylesheet, colors, parent=app)
+        applying.start()
+    else:
+        _reset_windows(app)
+        set_stylesheet(app, stylesheet, colors, palette=False)
+
+    with instrument.phase("state"):
+        _theme_state().update(name, colors)
+    return applying
+
+
+def _reset_windows(app):
+    """Undo a progressive apply before styling the whole application."""
+    progressive = sys.modules.get(f"{__name__}.progressive")
+    if progressive is not None and isinstance(app, QtWidgets.QApplication):
+        progressive.reset_windows()
+
+
+def set_stylesheet(app, stylesheet, theme, palette=True):
+    """Set `stylesheet` on `app` and tint the palette for `theme`.
 
+    Nothing is done when both are what was set on `app` last, as a new
+    stylesheet repolishes every widget even when it is the same string.
+    Returns whether it was set.
+    """
+    # The builtin hash is enough, the fingerprint never leaves the process
+    fingerprint = f"{hash((stylesheet, theme['primaryColor'])):x}"
     if _FEATURE:
-        app.style_sheet = stylesheet
+        unchanged = (
+            app.property(FINGERPRINT) == fingerprint
+            and app.style_sheet == stylesheet
+        )
     else:
-        app.setStyleSheet(stylesheet)
+        unchanged = (
+            app.property(FINGERPRINT) == fingerprint
+            and app.styleSheet() == stylesheet
+        )
+    if unchanged:
+        _APPLIES["skipped"] += 1
+        return False
+
+    if palette:
+        with instrument.phase("palette"):
+            set_palette(theme)
+
+    instrument.count("applied", len(stylesheet))
+    with instrument.phase("setStyleSheet"):
+        if _FEATURE:
+            app.style_sheet = stylesheet
+            app.set_property(FINGERPRINT, fingerprint)
+        else:
+            app.setStyleSheet(stylesheet)
+            app.setProperty(FINGERPRINT, fingerprint)
+    _APPLIES["applied"] += 1
+    return True
+
+
+def apply_stats(reset=False):
+    """Return the number of stylesheets set and skipped as unchanged."""
+    stats = dict(_APPLIES)
+    if reset:
+        for key in _APPLIES:
+            _APPLIES[key] = 0
+    return stats
 
 
 def opacity(theme, value=0.5):
@@ -339,8 +758,37 @@ def density(
     return density_
 
 
-def set_icons_theme(theme, parent="theme"):
-    """"""
+def set_icons_theme(theme, parent="theme", cache=False, memory=False):
+    """Generate the icons for `theme` and register them as `icon:`.
+
+    With `cache` the icons are reused from the content addressed cache in
+    `resources.CACHE_PATH` when they were generated before, and `parent` is
+    not written to, unless the cache cannot be written. With `memory` they
+    are served from in-memory Qt resources and nothing is written to disk
+    at all.
+    """
+    register_icons(generate_icons(theme, parent, cache, memory))
+
+
+def _cache_icons(parent, cache_icons):
+    """Whether to use the icon cache, by default only when the icons would
+    go to the default `parent`, a folder given is always written to.
+    """
+    if cache_icons is None:
+        return parent == "theme"
+    return bool(cache_icons)
+
+
+def generate_icons(
+    theme, parent="theme", cache=False, memory=False, store=None
+):
+    """Generate the icons for `theme`, without registering them.
+
+    Does not touch Qt, so it may run on any thread; see `set_icons_theme`
+    for `cache` and `memory`, and `ResourseGenerator` for `store`.
+    """
+    from .resources import ResourseGenerator
+
     source = os.path.join(os.path.dirname(__file__), "resources", "source")
     resources = ResourseGenerator(
         primary=theme["primaryColor"],
@@ -348,33 +796,133 @@ def set_icons_theme(theme, parent="theme"):
         disabled=theme["secondaryLightColor"],
         source=source,
         parent=parent,
+        cache=cache,
+        memory=memory,
+        store=store,
     )
     resources.generate()
+    return resources
+
+
+def register_icons(resources):
+    """Register the icons of a generated `ResourseGenerator` as `icon:`."""
+    if not _GUI:
+        _no_binding()
+        return
+    rebuild_planner().forget(*ICONS)
+
+    from .resources.generate import register_bundles
+
+    if _FEATURE:
+        # noinspection PyUnresolvedReferences
+        register_bundles(
+            resources.bundles,
+            QtCore.QResource.register_resource_data,
+            QtCore.QResource.unregister_resource_data,
+        )
+    else:
+        register_bundles(
+            resources.bundles,
+            QtCore.QResource.registerResourceData,
+            QtCore.QResource.unregisterResourceData,
+        )
+
+    # The search paths are replaced, not appended, otherwise the first
+    # registered icon set would keep shadowing every later one.
+    if _FEATURE:
+        # noinspection PyUnresolvedReferences
+        QtCore.QDir.set_search_paths("icon", resources.search_paths)
+        # noinspection PyUnresolvedReferences
+        QtCore.QDir.add_search_path(
+            "qt_material6",
+            os.path.join(os.path.dirname(__file__), "resources"),
+        )
+    else:
+        QtCore.QDir.setSearchPaths("icon", resources.search_paths)
+        QtCore.QDir.addSearchPath(
+            "qt_material6",
+            os.path.join(os.path.dirname(__file__), "resources"),
+        )
 
-    if _GUI:
+
+def widget_classes(widgets):
+    """Return the class names, base classes included, of `widgets`.
+
+    `widgets` is a QApplication, a widget whose whole tree is scanned, or
+    an iterable of widgets and class names. Popups Qt only creates on
+    demand are added for the widgets that own them.
+    """
+    if isinstance(widgets, QtWidgets.QApplication):
         if _FEATURE:
-            # noinspection PyUnresolvedReferences
-            QtCore.QDir.add_search_path("icon", resources.index)
-            # noinspection PyUnresolvedReferences
-            QtCore.QDir.add_search_path(
-                "qt_material6",
-                os.path.join(os.path.dirname(__file__), "resources"),
-            )
+            widgets = widgets.all_widgets()
         else:
-            QtCore.QDir.addSearchPath("icon", resources.index)
-            QtCore.QDir.addSearchPath(
-                "qt_material6",
-                os.path.join(os.path.dirname(__file__), "resources"),
-            )
+            widgets = widgets.allWidgets()
+    elif isinstance(widgets, QtWidgets.QWidget):
+        if _FEATURE:
+            widgets = [widgets] + widgets.find_children(QtWidgets.QWidget)
+        else:
+            widgets = [widgets] + widgets.findChildren(QtWidgets.QWidget)
+
+    classes = set()
+    pending = list(widgets)
+    while pending:
+        widget = pending.pop()
+        if isinstance(widget, str):
+            widget_class = getattr(QtWidgets, widget, None)
+            if widget_class is None:
+                classes.add(widget)
+                continue
+            meta = widget_class.staticMetaObject
+        elif _FEATURE:
+            meta = widget.meta_object()
+        else:
+            meta = widget.metaObject()
+
+        while meta is not None:
+            if _FEATURE:
+                name = meta.class_name()
+                meta = meta.super_class()
+            else:
+                name = meta.className()
+                meta = meta.superClass()
+            if name in classes:
+                break
+            classes.add(name)
+            pending.extend(IMPLIED.get(name, ()))
+
+    return classes
 
 
 def list_themes():
     """"""
-    themes = os.listdir(
-        os.path.join(os.path.dirname(os.path.abspath(__file__)), "themes")
-    )
-    themes = filter(lambda a: a.endswith("xml"), themes)
-    return sorted(list(themes))
+    return THEME_REGISTRY.names()
+
+
+def _theme_state():
+    """"""
+    from .state import theme_state
+
+    return theme_state()
+
+
+def __getattr__(name):
+    """Import `QtStyleTools`, and the Qt UI loader with it, on first use."""
+    if name == "QtStyleTools":
+        from .qt_style_tools import QtStyleTools
+
+        globals()[name] = QtStyleTools
+        return QtStyleTools
+    if name in ("ThemeState", "theme_state"):
+        from . import state
+
+        globals()[name] = getattr(state, name)
+        return globals()[name]
+    if name == "ProgressiveApply":
+        from .progressive import ProgressiveApply
+
+        globals()[name] = ProgressiveApply
+        return ProgressiveApply
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_hook_dirs():
@@ -384,17 +932,60 @@ def get_hook_dirs():
 
 __all__ = [
     add_fonts,
+    add_timing_callback,
+    apply_build,
+    apply_stats,
     apply_stylesheet,
     build_stylesheet,
+    build_theme,
+    capture_timings,
     density,
+    disable_bytecode_cache,
+    enable_bytecode_cache,
+    export_resources,
     export_theme,
+    generate_icons,
     get_hook_dirs,
+    get_template,
     get_theme,
     list_themes,
+    minify_stylesheet,
     opacity,
+    prepare_theme,
     QtCore,
     QtGui,
-    QtStyleTools,
     QtWidgets,
+    read_fonts,
+    rebuild_planner,
+    rebuild_stats,
+    register_icons,
+    registered_fonts,
+    remove_timing_callback,
+    render_flags,
+    render_stylesheet,
+    render_template,
     set_icons_theme,
+    set_palette,
+    set_slow_threshold,
+    set_stylesheet,
+    seed_theme,
+    seed_themes,
+    set_stylesheet_cache_size,
+    stylesheet_cache_clear,
+    stylesheet_cache_info,
+    template_cache_clear,
+    template_cache_info,
+    template_dependencies,
+    template_sections,
+    theme_name,
+    count_rules,
+    prune_stylesheet,
+    widget_classes,
+    RebuildPlanner,
+    THEME_REGISTRY,
+    ThemeRecord,
+    Theme,
+    ThemeBuild,
+    ThemeRegistry,
+    Timings,
 ]
@@ -0,0 +1,5 @@
+import sys
+
+from .prebuild import main
+
+sys.exit(main())
@@ -0,0 +1,129 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import QtCore, apply_build, build_theme
+
+# PySide6 and PyQt6 name the signal factory differently.
+Signal = getattr(QtCore, "Signal", None) or QtCore.pyqtSignal
+
+
+########################################################################
+class ThemeBuilder(QtCore.QObject):
+    """Build themes on a worker thread and apply them on the GUI thread.
+
+    Only the stylesheet assignment, the icon registration and the palette
+    update run on the GUI thread, through a queued signal. Every `apply`
+    supersedes the previous ones: a build not started yet is dropped and a
+    build already running stops at its next stage, its result discarded.
+    """
+
+    applied = Signal(object)
+    failed = Signal(object)
+    _built = Signal(object, object, object)
+
+    # ----------------------------------------------------------------------
+    def __init__(self, parent=None):
+        """Constructor"""
+        super().__init__(parent)
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._future = None
+        self._target = None
+        # A single worker keeps the builds, and their side effects on the
+        # environment, in request order.
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="qt_material6"
+        )
+        self._built.connect(
+            self._apply, QtCore.Qt.ConnectionType.QueuedConnection
+        )
+
+    # ----------------------------------------------------------------------
+    def apply(
+        self,
+        app,
+        theme="",
+        invert_secondary=False,
+        extra=None,
+        parent="theme",
+        in_memory_icons=False,
+        callable_=None,
+        fonts=True,
+    ):
+        """Build `theme` in the background, then apply it to `app`.
+
+        `callable_` is called on the GUI thread once it was applied. Returns
+        the generation of the request.
+        """
+        generation = self.cancel()
+        self._target = (app, callable_, fonts)
+        self._future = self._executor.submit(
+            self._build,
+            generation,
+            theme=theme,
+            invert_secondary=invert_secondary,
+            extra=dict(extra or {}),
+            parent=parent,
+            in_memory_icons=in_memory_icons,
+        )
+        return generation
+
+    # ----------------------------------------------------------------------
+    def cancel(self):
+        """Drop every pending request, return the next generation."""
+        with self._lock:
+            self.generation += 1
+            # The superseded build never emits, nothing is pending anymore
+            self._target = None
+            if self._future is not None:
+                self._future.cancel()
+                self._future = None
+            return self.generation
+
+    # ----------------------------------------------------------------------
+    def pending(self):
+        """Whether a build was requested and not applied yet."""
+        return self._target is not None
+
+    # ----------------------------------------------------------------------
+    def shutdown(self, wait=True):
+        """"""
+        self.cancel()
+        self._executor.shutdown(wait=wait)
+
+    # ----------------------------------------------------------------------
+    def _build(self, generation, **kwargs):
+        """Runs on the worker thread."""
+        build = error = None
+        try:
+            build = build_theme(
+                cancelled=lambda: generation != self.generation, **kwargs
+            )
+        except Exception as e:
+            error = e
+
+        if generation == self.generation:
+            self._built.emit(generation, build, error)
+
+    # ----------------------------------------------------------------------
+    def _apply(self, generation, build, error):
+        """Runs on the GUI thread."""
+        if generation != self.generation or self._target is None:
+            logging.debug(f"Discarded the superseded theme build {generation}")
+            return
+
+        app, callable_, fonts = self._target
+        self._target = None
+        if error is not None:
+            logging.error(f"Failed to build the theme: {error}")
+            self.failed.emit(error)
+            return
+        if build is None:
+            # The theme does not exist, `get_theme` already warned.
+            return
+
+        apply_build(app, build, fonts)
+        if callable_:
+            callable_()
+        self.applied.emit(build)
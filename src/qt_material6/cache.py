@@ -0,0 +1,94 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+########################################################################
+class LRUCache:
+    """Thread safe least recently used cache.
+
+    Bounded by number of entries with `maxsize` and, optionally, by the
+    total length of the cached values with `maxbytes`; None disables a
+    bound.
+    """
+
+    # ----------------------------------------------------------------------
+    def __init__(self, maxsize=32, maxbytes=None):
+        """Constructor"""
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ----------------------------------------------------------------------
+    def get(self, key, default=None):
+        """"""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    # ----------------------------------------------------------------------
+    def put(self, key, value):
+        """"""
+        with self._lock:
+            if key in self._data:
+                self.nbytes -= len(self._data.pop(key))
+            self._data[key] = value
+            self.nbytes += len(value)
+            self._evict()
+
+    # ----------------------------------------------------------------------
+    def resize(self, maxsize=None, maxbytes=None):
+        """Change the bounds, evicting what no longer fits."""
+        with self._lock:
+            self.maxsize = maxsize
+            self.maxbytes = maxbytes
+            self._evict()
+
+    # ----------------------------------------------------------------------
+    def info(self):
+        """"""
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+    # ----------------------------------------------------------------------
+    def clear(self):
+        """"""
+        with self._lock:
+            self._data.clear()
+            self.nbytes = self.hits = self.misses = 0
+
+    # ----------------------------------------------------------------------
+    def __len__(self):
+        """"""
+        return len(self._data)
+
+    # ----------------------------------------------------------------------
+    def _evict(self):
+        """"""
+        while self._data and (
+            (self.maxsize is not None and len(self._data) > self.maxsize)
+            or (self.maxbytes is not None and self.nbytes > self.maxbytes)
+        ):
+            _, value = self._data.popitem(last=False)
+            self.nbytes -= len(value)
+
+
+# ----------------------------------------------------------------------
+def fingerprint(*values):
+    """Stable digest of JSON like `values`, dictionaries in any order."""
+    canonical = json.dumps(
+        values, sort_keys=True, separators=(",", ":"), default=repr
+    )
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
@@ -0,0 +1,99 @@
+import functools
+import logging
+import os
+import threading
+
+FONTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+
+# Styles the template uses, `font-weight: bold` and the normal text
+STYLES = ("Regular", "Bold")
+
+_LOCK = threading.Lock()
+# Font file -> application font id, every file is registered once
+_REGISTERED = {}
+
+
+# ----------------------------------------------------------------------
+@functools.lru_cache(maxsize=1)
+def bundled_fonts():
+    """Map every bundled family, like RobotoCondensed, to its files."""
+    families = {}
+    for folder in sorted(os.listdir(FONTS_PATH)):
+        folder = os.path.join(FONTS_PATH, folder)
+        if not os.path.isdir(folder):
+            continue
+        for font in sorted(os.listdir(folder)):
+            if font.endswith(".ttf"):
+                family = font[:-4].split("-")[0]
+                families.setdefault(family, []).append(
+                    os.path.join(folder, font)
+                )
+    return families
+
+
+# ----------------------------------------------------------------------
+def font_files(font_family="Roboto", styles=STYLES):
+    """Return the bundled files of the families named in `font_family`.
+
+    `font_family` is the CSS value of the theme, like `"Roboto", serif`,
+    families that are not bundled are ignored. Only the files of `styles`
+    are returned, every style if it is None.
+    """
+    families = {
+        family.lower(): files for family, files in bundled_fonts().items()
+    }
+    files = []
+    for family in str(font_family).split(","):
+        family = family.strip().strip("'\"").replace(" ", "").lower()
+        for path in families.get(family, []):
+            style = os.path.basename(path)[:-4].split("-")[-1]
+            if styles is None or style in styles:
+                files.append(path)
+    return files
+
+
+# ----------------------------------------------------------------------
+def pending_fonts(font_family="Roboto", styles=STYLES):
+    """Return the files of `font_files` not registered yet."""
+    return [
+        path
+        for path in font_files(font_family, styles)
+        if path not in _REGISTERED
+    ]
+
+
+# ----------------------------------------------------------------------
+def read_fonts(font_family="Roboto", styles=STYLES):
+    """Return {file: bytes} of the fonts not registered yet.
+
+    Only reads files, so it may run on any thread, the data is then
+    registered on the GUI thread with `add_fonts`.
+    """
+    data = {}
+    for path in pending_fonts(font_family, styles):
+        with open(path, "rb") as file:
+            data[path] = file.read()
+    return data
+
+
+# ----------------------------------------------------------------------
+def register_fonts(data, add):
+    """Register the fonts of `data` with `add`, returning the font id.
+
+    `data` maps every font file to the argument of `add`, its path or
+    its bytes. Files already registered are skipped, even the ones Qt
+    rejected.
+    """
+    with _LOCK:
+        for path, content in data.items():
+            if path not in _REGISTERED:
+                _REGISTERED[path] = add(content)
+                if _REGISTERED[path] < 0:
+                    logging.warning(f"Failed to load the font {path}")
+
+
+# ----------------------------------------------------------------------
+def registered_fonts():
+    """Map every font file registered so far to its application font id."""
+    with _LOCK:
+        return dict(_REGISTERED)
@@ -0,0 +1,225 @@
+"""Per phase timing of the stylesheet build and apply calls.
+
+Nothing is measured until a callback is registered or a slow threshold is
+set, until then every hook is a global flag check.
+"""
+
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+_NULL = nullcontext()
+_CALLBACKS = []
+_STATE = threading.local()
+_ENABLED = False
+_THRESHOLD = None
+
+
+########################################################################
+class Timings:
+    """The phases of one instrumented call, in seconds, and byte counts.
+
+    `phases` holds (name, depth, seconds) in the order they started,
+    depth is the nesting level, phases of a nested call included.
+    """
+
+    __slots__ = ("counts", "name", "phases", "start", "total")
+
+    # ----------------------------------------------------------------------
+    def __init__(self, name):
+        """Constructor"""
+        self.name = name
+        self.phases = []
+        self.counts = {}
+        self.start = time.perf_counter()
+        self.total = None
+
+    # ----------------------------------------------------------------------
+    def as_dict(self):
+        """Milliseconds per top level phase, and the byte counts."""
+        phases = {}
+        for name, depth, seconds in self.phases:
+            if depth == 0:
+                phases[name] = phases.get(name, 0) + seconds * 1000
+        return {
+            "name": self.name,
+            "total": self.total * 1000,
+            "phases": phases,
+            "counts": dict(self.counts),
+        }
+
+    # ----------------------------------------------------------------------
+    def breakdown(self):
+        """"""
+        lines = [f"{self.name}: {self.total * 1000:.2f} ms"]
+        for name, depth, seconds in self.phases:
+            lines.append(f"{'  ' * (depth + 1)}{name}: {seconds * 1000:.2f} ms")
+        for name, value in self.counts.items():
+            lines.append(f"  {name}: {value} bytes")
+        return "\n".join(lines)
+
+
+########################################################################
+class _Phase:
+    """"""
+
+    __slots__ = ("depth", "index", "start", "timings")
+
+    # ----------------------------------------------------------------------
+    def __init__(self, timings, name):
+        """Constructor"""
+        self.timings = timings
+        self.depth = _STATE.depth
+        self.index = len(timings.phases)
+        timings.phases.append((name, self.depth, None))
+
+    # ----------------------------------------------------------------------
+    def __enter__(self):
+        """"""
+        _STATE.depth += 1
+        self.start = time.perf_counter()
+        return self.timings
+
+    # ----------------------------------------------------------------------
+    def __exit__(self, *exc_info):
+        """"""
+        elapsed = time.perf_counter() - self.start
+        _STATE.depth -= 1
+        name, depth, _ = self.timings.phases[self.index]
+        self.timings.phases[self.index] = (name, depth, elapsed)
+
+
+########################################################################
+class _Record:
+    """"""
+
+    __slots__ = ("timings",)
+
+    # ----------------------------------------------------------------------
+    def __init__(self, name):
+        """Constructor"""
+        self.timings = Timings(name)
+
+    # ----------------------------------------------------------------------
+    def __enter__(self):
+        """"""
+        _STATE.timings = self.timings
+        _STATE.depth = 0
+        self.timings.start = time.perf_counter()
+        return self.timings
+
+    # ----------------------------------------------------------------------
+    def __exit__(self, *exc_info):
+        """"""
+        timings = self.timings
+        timings.total = time.perf_counter() - timings.start
+        _STATE.timings = None
+        _report(timings)
+
+
+# ----------------------------------------------------------------------
+def record(name):
+    """Time the call `name`, or a phase of the call already timed."""
+    if not _ENABLED:
+        return _NULL
+    timings = getattr(_STATE, "timings", None)
+    if timings is not None:
+        return _Phase(timings, name)
+    return _Record(name)
+
+
+# ----------------------------------------------------------------------
+def recorded(function):
+    """Decorator timing every call of `function` with `record`."""
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not _ENABLED:
+            return function(*args, **kwargs)
+        with record(function.__name__):
+            return function(*args, **kwargs)
+
+    return wrapper
+
+
+# ----------------------------------------------------------------------
+def phase(name):
+    """Time a phase of the call being timed, if any."""
+    if not _ENABLED:
+        return _NULL
+    timings = getattr(_STATE, "timings", None)
+    if timings is None:
+        return _NULL
+    return _Phase(timings, name)
+
+
+# ----------------------------------------------------------------------
+def count(name, value):
+    """Add `value` bytes to the count `name` of the call being timed."""
+    if not _ENABLED:
+        return
+    timings = getattr(_STATE, "timings", None)
+    if timings is not None:
+        timings.counts[name] = timings.counts.get(name, 0) + value
+
+
+# ----------------------------------------------------------------------
+def add_timing_callback(callback):
+    """Call `callback` with the `Timings` of every build and apply."""
+    _CALLBACKS.append(callback)
+    _update()
+
+
+# ----------------------------------------------------------------------
+def remove_timing_callback(callback):
+    """"""
+    if callback in _CALLBACKS:
+        _CALLBACKS.remove(callback)
+    _update()
+
+
+# ----------------------------------------------------------------------
+def set_slow_threshold(milliseconds=1000 / 60):
+    """Log the breakdown of every call slower than `milliseconds`.
+
+    The default is the budget of one frame at 60 Hz, None disables it.
+    """
+    global _THRESHOLD
+
+    _THRESHOLD = milliseconds
+    _update()
+
+
+# ----------------------------------------------------------------------
+@contextmanager
+def capture_timings():
+    """Collect the `Timings` of the calls made in the `with` block."""
+    captured = []
+    add_timing_callback(captured.append)
+    try:
+        yield captured
+    finally:
+        remove_timing_callback(captured.append)
+
+
+# ----------------------------------------------------------------------
+def _update():
+    """"""
+    global _ENABLED
+
+    _ENABLED = bool(_CALLBACKS) or _THRESHOLD is not None
+
+
+# ----------------------------------------------------------------------
+def _report(timings):
+    """"""
+    for callback in list(_CALLBACKS):
+        try:
+            callback(timings)
+        except Exception:
+            logging.exception("Timing callback failed")
+
+    if _THRESHOLD is not None and timings.total * 1000 > _THRESHOLD:
+        logging.warning(f"Slow {timings.breakdown()}")
@@ -0,0 +1,166 @@
+"""Run only the stages of an apply whose inputs changed since the last one."""
+
+import logging
+import os
+
+from .template import TEMPLATE_FILE
+
+# Theme variables every stage depends on, None for all of them. The icon
+# sets are drawn with their own color and `secondaryColor` as background,
+# the active set with a fixed gray.
+STAGES = {
+    "fonts": ("font_family",),
+    "icons:disabled": ("secondaryLightColor", "secondaryColor"),
+    "icons:primary": ("primaryColor", "secondaryColor"),
+    "icons:active": ("secondaryColor",),
+    "render": None,
+    "palette": ("primaryColor",),
+}
+ICONS = tuple(stage for stage in STAGES if stage.startswith("icons:"))
+
+_PLANNER = None
+
+
+########################################################################
+class RebuildPlan:
+    """The stages to run for one apply, and the inputs they are run for."""
+
+    __slots__ = ("inputs", "stages", "stylesheet")
+
+    # ----------------------------------------------------------------------
+    def __init__(self, stages, inputs, stylesheet=None):
+        """Constructor"""
+        self.stages = stages
+        self.inputs = inputs
+        self.stylesheet = stylesheet
+
+    # ----------------------------------------------------------------------
+    def __contains__(self, stage):
+        """"""
+        return stage in self.stages
+
+    # ----------------------------------------------------------------------
+    @property
+    def icons(self):
+        """Whether any icon set has to be generated and registered."""
+        return any(stage in self.stages for stage in ICONS)
+
+    # ----------------------------------------------------------------------
+    def __repr__(self):
+        """"""
+        return f"RebuildPlan({', '.join(self.stages) or 'nothing'})"
+
+
+########################################################################
+class RebuildPlanner:
+    """Compare the inputs of an apply with those of the last one.
+
+    Fonts, icons and the palette are application wide, so a stage whose
+    inputs did not change is already in effect and skipped. The functions
+    changing them from outside an apply, like `register_icons`, call
+    `forget` so that the next apply runs the stage again.
+    """
+
+    # ----------------------------------------------------------------------
+    def __init__(self):
+        """Constructor"""
+        self._inputs = {}
+        self._stylesheet = None
+        self._stats = {stage: {"ran": 0, "skipped": 0} for stage in STAGES}
+
+    # ----------------------------------------------------------------------
+    def plan(
+        self,
+        theme,
+        parent="theme",
+        template=TEMPLATE_FILE,
+        in_memory_icons=False,
+        minify=False,
+        cache_icons=True,
+    ):
+        """Return the `RebuildPlan` of the variables from `prepare_theme`.
+
+        The arguments of `build_stylesheet`, and the modification time of
+        the template file, are inputs too.
+        """
+        try:
+            mtime = os.stat(template).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        inputs = {}
+        for stage, names in STAGES.items():
+            if names is None:
+                inputs[stage] = (dict(theme), template, mtime, bool(minify))
+            else:
+                inputs[stage] = tuple(theme.get(name) for name in names)
+        for stage in ICONS:
+            inputs[stage] += (parent, bool(in_memory_icons), cache_icons)
+        return self.compare(inputs)
+
+    # ----------------------------------------------------------------------
+    def compare(self, inputs):
+        """Return the `RebuildPlan` of the `inputs` of an earlier plan.
+
+        `build_theme` plans on a worker thread, the stages are compared
+        again on the GUI thread by `apply_build`, with the builds done
+        meanwhile. Stages left out of `inputs` are not run.
+        """
+        stages = [
+            stage
+            for stage in STAGES
+            if stage in inputs
+            and (
+                stage not in self._inputs
+                or self._inputs[stage] != inputs[stage]
+            )
+        ]
+        return RebuildPlan(stages, inputs, self._stylesheet)
+
+    # ----------------------------------------------------------------------
+    def done(self, plan, stylesheet):
+        """Record the inputs of `plan` once its stages ran."""
+        for stage in STAGES:
+            if stage in plan:
+                self._stats[stage]["ran"] += 1
+            else:
+                self._stats[stage]["skipped"] += 1
+                logging.debug(f"Skipped {stage}, its inputs did not change")
+        self._inputs.update(plan.inputs)
+        self._stylesheet = stylesheet
+
+    # ----------------------------------------------------------------------
+    def forget(self, *stages):
+        """Run `stages`, every stage if none is given, on the next apply."""
+        if not stages:
+            self._inputs.clear()
+            self._stylesheet = None
+        for stage in stages:
+            self._inputs.pop(stage, None)
+
+    # ----------------------------------------------------------------------
+    def stats(self, reset=False):
+        """Return {stage: {"ran": n, "skipped": n}} since the start or the
+        last reset.
+        """
+        stats = {stage: dict(counts) for stage, counts in self._stats.items()}
+        if reset:
+            for counts in self._stats.values():
+                counts["ran"] = counts["skipped"] = 0
+        return stats
+
+
+# ----------------------------------------------------------------------
+def rebuild_planner():
+    """Return the `RebuildPlanner` used by `apply_stylesheet`."""
+    global _PLANNER
+
+    if _PLANNER is None:
+        _PLANNER = RebuildPlanner()
+    return _PLANNER
+
+
+# ----------------------------------------------------------------------
+def rebuild_stats(reset=False):
+    """Return the stages run and skipped by `apply_stylesheet`."""
+    return rebuild_planner().stats(reset)
@@ -0,0 +1,287 @@
+"""Render themes ahead of time, `python -m qt_material6 build`.
+
+Every combination of the matrix is written to its own folder of the
+output: `<name>.qss` and the `primary`, `disabled` and `active` icons it
+refers to, so an application only has to register the folder as the
+`icon` search path and apply the stylesheet. A manifest of the input hash
+of every folder lets later runs skip what did not change.
+"""
+
+import argparse
+import hashlib
+import importlib
+import importlib.util
+import itertools
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from . import (
+    generate_icons,
+    list_themes,
+    prepare_theme,
+    render_flags,
+    render_stylesheet,
+)
+from .cache import fingerprint
+from .template import TEMPLATE_FILE
+
+MANIFEST = "manifest.json"
+# Bump whenever the output changes for the same inputs.
+PREBUILD_VERSION = 1
+
+SOURCE = os.path.join(os.path.dirname(__file__), "resources", "source")
+
+
+# ----------------------------------------------------------------------
+def matrix_entries(themes, invert_secondary, density_scale, extra):
+    """Return the build entries of every combination of the matrix.
+
+    `invert_secondary` holds True, False or "auto", which inverts light
+    themes only, and `extra` maps a name to the overrides of a variant,
+    the name is left out of the folder name when empty.
+    """
+    entries = []
+    for theme, invert, density, (variant, overrides) in itertools.product(
+        themes, invert_secondary, density_scale, extra.items()
+    ):
+        name = os.path.splitext(os.path.basename(theme))[0]
+        if invert == "auto":
+            invert = name.startswith("light")
+        elif invert != name.startswith("light"):
+            name += "_inverted" if invert else "_uninverted"
+        if str(density) != "0":
+            name += f"_density{density}"
+        if variant:
+            name += f"_{variant}"
+
+        entries.append(
+            {
+                "name": name,
+                "theme": theme,
+                "invert_secondary": invert,
+                "extra": dict(overrides, density_scale=str(density)),
+            }
+        )
+    return entries
+
+
+# ----------------------------------------------------------------------
+def shared_inputs(template=TEMPLATE_FILE):
+    """Hash of the inputs every entry shares, the template, icons, and the
+    platform and binding flags of the render.
+    """
+    from .resources.generate import GENERATOR_VERSION, source_digest
+
+    with open(template, "rb") as file:
+        template_digest = hashlib.sha256(file.read()).hexdigest()
+    return fingerprint(
+        PREBUILD_VERSION,
+        GENERATOR_VERSION,
+        source_digest(SOURCE),
+        template_digest,
+        render_flags(),
+    )
+
+
+# ----------------------------------------------------------------------
+def input_hash(entry, prefix, shared):
+    """Hash of everything the output of `entry` depends on, or None if
+    its theme does not exist.
+    """
+    theme = prepare_theme(
+        entry["theme"], entry["invert_secondary"], entry["extra"]
+    )
+    if theme is None:
+        return None
+    return fingerprint(shared, theme, prefix)
+
+
+# ----------------------------------------------------------------------
+def build_entry(entry, output, prefix="icon:/", store=False):
+    """Write the stylesheet and icons of `entry`, return its name.
+
+    With `store` the icons are hardlinked from the shared icon store. Module
+    level, so it can run in a worker process.
+    """
+    folder = os.path.abspath(os.path.join(output, entry["name"]))
+    theme = prepare_theme(
+        entry["theme"], entry["invert_secondary"], entry["extra"]
+    )
+    generate_icons(theme, parent=folder, store=store)
+    stylesheet = render_stylesheet(theme)
+
+    path = os.path.join(folder, f"{entry['name']}.qss")
+    with open(f"{path}.tmp", "w") as file:
+        file.write(stylesheet.replace("icon:/", prefix))
+    os.replace(f"{path}.tmp", path)
+    return entry["name"]
+
+
+# ----------------------------------------------------------------------
+def build(
+    entries, output, prefix="icon:/", jobs=None, force=False, store=False
+):
+    """Build the `entries` whose inputs changed, in parallel.
+
+    Returns the names of the entries built and of the ones skipped.
+    """
+    os.makedirs(output, exist_ok=True)
+    manifest_path = os.path.join(output, MANIFEST)
+    try:
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        manifest = {}
+
+    # Built in this process too with one job, and hashed, with the binding
+    # flags the workers render with
+    binding = _worker_binding()
+    if binding:
+        binding["initializer"](*binding["initargs"])
+
+    shared = shared_inputs()
+    pending, skipped = [], []
+    for entry in entries:
+        digest = input_hash(entry, prefix, shared)
+        if digest is None:
+            continue
+        qss = os.path.join(output, entry["name"], f"{entry['name']}.qss")
+        if (
+            not force
+            and manifest.get(entry["name"]) == digest
+            and os.path.exists(qss)
+        ):
+            skipped.append(entry["name"])
+        else:
+            pending.append((entry, digest))
+
+    jobs = min(jobs or os.cpu_count() or 1, len(pending))
+    if jobs > 1:
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            mp_context=multiprocessing.get_context("spawn"),
+            **binding,
+        ) as pool:
+            futures = [
+                (
+                    pool.submit(build_entry, entry, output, prefix, store),
+                    digest,
+                )
+                for entry, digest in pending
+            ]
+            built = [(future.result(), digest) for future, digest in futures]
+    else:
+        built = [
+            (build_entry(entry, output, prefix, store), digest)
+            for entry, digest in pending
+        ]
+
+    for name, digest in built:
+        manifest[name] = digest
+    with open(f"{manifest_path}.tmp", "w") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+    return [name for name, _ in built], skipped
+
+
+# ----------------------------------------------------------------------
+def _worker_binding():
+    """Import a Qt binding in the workers before the package, as it
+    expects, when one is installed.
+    """
+    for binding in ["PySide6", "PyQt6"]:
+        if importlib.util.find_spec(binding) is not None:
+            return {
+                "initializer": importlib.import_module,
+                "initargs": (f"{binding}.QtCore",),
+            }
+    return {}
+
+
+# ----------------------------------------------------------------------
+def load_matrix(path):
+    """Read a matrix file, a JSON object with the keys of `main`."""
+    with open(path) as file:
+        return json.load(file)
+
+
+# ----------------------------------------------------------------------
+def main(argv=None):
+    """"""
+    parser = argparse.ArgumentParser(
+        prog="python -m qt_material6",
+        description="Material inspired stylesheets for PySide6 and PyQt6.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    command = commands.add_parser(
+        "build",
+        help="prebuild stylesheets and icons",
+        description=__doc__.split("\n\n")[1],
+    )
+    command.add_argument(
+        "--matrix",
+        help="JSON file with 'themes', 'invert_secondary', 'density_scale' "
+        "and 'extra', a map of variant names to overrides",
+    )
+    command.add_argument(
+        "--theme",
+        action="append",
+        help="theme name or file, 'all' for every bundled one",
+    )
+    command.add_argument(
+        "--invert",
+        choices=["auto", "no", "yes", "both"],
+        help="invert the secondary colors, 'auto' for light themes only",
+    )
+    command.add_argument(
+        "--density", action="append", type=int, help="density scale"
+    )
+    command.add_argument("--output", default="themes")
+    command.add_argument("--prefix", default="icon:/")
+    command.add_argument(
+        "--jobs", type=int, help="worker processes, one per CPU by default"
+    )
+    command.add_argument(
+        "--force", action="store_true", help="rebuild unchanged outputs too"
+    )
+    command.add_argument(
+        "--store",
+        action="store_true",
+        help="hardlink the icons from the shared icon store, the same icon "
+        "is then stored once for every theme",
+    )
+    args = parser.parse_args(argv)
+
+    matrix = load_matrix(args.matrix) if args.matrix else {}
+    themes = args.theme or matrix.get("themes", ["all"])
+    if themes == "all" or "all" in themes:
+        themes = list_themes()
+
+    invert = (
+        {
+            "auto": ["auto"],
+            "no": [False],
+            "yes": [True],
+            "both": [False, True],
+        }[args.invert]
+        if args.invert
+        else matrix.get("invert_secondary", ["auto"])
+    )
+
+    entries = matrix_entries(
+        themes,
+        invert,
+        args.density or matrix.get("density_scale", [0]),
+        matrix.get("extra", {"": {}}),
+    )
+    built, skipped = build(
+        entries, args.output, args.prefix, args.jobs, args.force, args.store
+    )
+    print(
+        f"{len(built)} built, {len(skipped)} unchanged, in "
+        f"{os.path.abspath(args.output)}"
+    )
+    return 0
@@ -0,0 +1,352 @@
+"""Apply a stylesheet window by window, across event loop iterations.
+
+Qt repolishes the whole subtree of a widget inside the one call that sets
+its stylesheet, so the stylesheet is set on every top-level window instead
+of the application: the windows on screen first, in one go, then the
+hidden and minimized ones a few at a time, giving the event loop back
+between batches.
+
+The hidden parts of the windows on screen, the pages of stacked and tab
+widgets not shown and the contents of closed dock widgets, are swapped for
+empty placeholders while their window is styled, and put back a few at a
+time later on, which styles them. A page shown meanwhile is put back right
+away.
+"""
+
+import logging
+import time
+
+from . import (
+    _FEATURE,
+    FINGERPRINT,
+    QtCore,
+    QtWidgets,
+    set_stylesheet,
+)
+from .builder import Signal
+
+# Property marking the windows styled here, so that an apply on the whole
+# application can take their stylesheet off again.
+STYLED = "qt_material6_progressive"
+
+_RUNNING = None
+
+
+########################################################################
+class ProgressiveApply(QtCore.QObject):
+    """Set `stylesheet` on the top-level windows of the application.
+
+    Nothing is done before the event loop runs, so the signals can be
+    connected after `start`. `progress` is emitted with the number of
+    windows and hidden parts done and the total after every batch,
+    `finished` once everything was styled. Windows created afterwards
+    without a parent are not styled, children of the styled windows are.
+    A different stylesheet set on the application before is taken off
+    first, so that the two themes do not mix.
+    """
+
+    progress = Signal(int, int)
+    finished = Signal()
+
+    # Milliseconds of work per event loop iteration, at least one window
+    # or hidden part is styled in each.
+    budget = 8
+
+    # ----------------------------------------------------------------------
+    def __init__(self, stylesheet, theme, windows=None, parent=None):
+        """Constructor"""
+        super().__init__(parent)
+        self.stylesheet = stylesheet
+        self.theme = theme
+        self.total = 0
+        self.done = 0
+        self._windows = windows
+        self._started = False
+        # (container, placeholder, widget, slot) of the detached parts
+        self._parts = []
+        self._hidden = []
+
+        self._timer = QtCore.QTimer(self)
+        if _FEATURE:
+            self._timer.single_shot = True
+            self._timer.interval = 0
+        else:
+            self._timer.setSingleShot(True)
+            self._timer.setInterval(0)
+        self._timer.timeout.connect(self._step)
+
+    # ----------------------------------------------------------------------
+    def start(self):
+        """Style the windows on screen on the next event loop iteration,
+        and the rest on the following ones.
+        """
+        global _RUNNING
+
+        if _RUNNING is not None and _RUNNING is not self:
+            _RUNNING.cancel()
+        _RUNNING = self
+        self._timer.start()
+
+    # ----------------------------------------------------------------------
+    def cancel(self):
+        """Stop styling, the windows not styled yet keep their stylesheet.
+
+        The hidden parts detached are put back, with the stylesheet their
+        window has.
+        """
+        global _RUNNING
+
+        self._timer.stop()
+        self._hidden = []
+        while self._parts:
+            self._attach(self._parts.pop(0))
+        if _RUNNING is self:
+            _RUNNING = None
+
+    # ----------------------------------------------------------------------
+    def running(self):
+        """"""
+        return _RUNNING is self
+
+    # ----------------------------------------------------------------------
+    def _begin(self):
+        """Style the windows on screen, without their hidden parts."""
+        windows = self._windows
+        if windows is None:
+            windows = QtWidgets.QApplication.topLevelWidgets()
+        # The window in use first
+        active = QtWidgets.QApplication.activeWindow()
+        windows = sorted(windows, key=lambda window: window is not active)
+        visible = [window for window in windows if on_screen(window)]
+        self._hidden = [window for window in windows if not on_screen(window)]
+
+        app = QtWidgets.QApplication.instance()
+        current = app.style_sheet if _FEATURE else app.styleSheet()
+        if current == self.stylesheet:
+            # Every window has it already
+            visible = self._hidden = []
+        elif current:
+            # Taken off before the windows get a stylesheet of their own,
+            # later it would repolish all of them once more
+            if _FEATURE:
+                app.style_sheet = ""
+                app.set_property(FINGERPRINT, None)
+            else:
+                app.setStyleSheet("")
+                app.setProperty(FINGERPRINT, None)
+
+        for window in visible:
+            for container, widget in hidden_parts(window):
+                self._parts.append(self._detach(container, widget))
+            self._style(window)
+
+        self.total = len(visible) + len(self._parts) + len(self._hidden)
+        self.done = len(visible)
+
+    # ----------------------------------------------------------------------
+    def _step(self):
+        """"""
+        if not self._started:
+            self._started = True
+            self._begin()
+            self._report()
+            return
+
+        deadline = time.perf_counter() + self.budget / 1000
+        while self._parts or self._hidden:
+            # The parts of the windows on screen first
+            if self._parts:
+                self._attach(self._parts.pop(0))
+            else:
+                self._style(self._hidden.pop(0))
+            self.done += 1
+            if time.perf_counter() > deadline:
+                break
+        self._report()
+
+    # ----------------------------------------------------------------------
+    def _style(self, window):
+        """"""
+        try:
+            set_stylesheet(window, self.stylesheet, self.theme, palette=False)
+            if _FEATURE:
+                window.set_property(STYLED, True)
+            else:
+                window.setProperty(STYLED, True)
+        except RuntimeError:
+            # Deleted since it was listed
+            logging.debug("Skipped a deleted window")
+
+    # ----------------------------------------------------------------------
+    def _detach(self, container, widget):
+        """Swap `widget` for a placeholder and take it off its window."""
+        placeholder = QtWidgets.QWidget()
+        stacked = isinstance(container, QtWidgets.QStackedWidget)
+
+        entry = [container, placeholder, widget, None]
+        # Put back as soon as it is shown
+        entry[3] = lambda *args: self._shown(entry)
+
+        if _FEATURE:
+            if stacked:
+                blocked = container.block_signals(True)
+                container.insert_widget(container.index_of(widget), placeholder)
+                container.remove_widget(widget)
+                container.block_signals(blocked)
+                container.current_changed.connect(entry[3])
+            else:
+                container.set_widget(placeholder)
+                container.visibility_changed.connect(entry[3])
+            widget.set_parent(None)
+        else:
+            if stacked:
+                blocked = container.blockSignals(True)
+                container.insertWidget(container.indexOf(widget), placeholder)
+                container.removeWidget(widget)
+                container.blockSignals(blocked)
+                container.currentChanged.connect(entry[3])
+            else:
+                container.setWidget(placeholder)
+                container.visibilityChanged.connect(entry[3])
+            widget.setParent(None)
+        return entry
+
+    # ----------------------------------------------------------------------
+    def _attach(self, entry):
+        """Put back a part taken off by `_detach`, which styles it."""
+        container, placeholder, widget, slot = entry
+        stacked = isinstance(container, QtWidgets.QStackedWidget)
+        try:
+            if _FEATURE:
+                if stacked:
+                    container.current_changed.disconnect(slot)
+                    # After the placeholder, so that it stays the current
+                    # page if it was shown
+                    blocked = container.block_signals(True)
+                    container.insert_widget(
+                        container.index_of(placeholder) + 1, widget
+                    )
+                    container.remove_widget(placeholder)
+                    container.block_signals(blocked)
+                else:
+                    container.visibility_changed.disconnect(slot)
+                    container.set_widget(widget)
+                placeholder.delete_later()
+            else:
+                if stacked:
+                    container.currentChanged.disconnect(slot)
+                    blocked = container.blockSignals(True)
+                    container.insertWidget(
+                        container.indexOf(placeholder) + 1, widget
+                    )
+                    container.removeWidget(placeholder)
+                    container.blockSignals(blocked)
+                else:
+                    container.visibilityChanged.disconnect(slot)
+                    container.setWidget(widget)
+                placeholder.deleteLater()
+        except RuntimeError:
+            # Its container was deleted meanwhile, and the placeholder too
+            logging.debug("Dropped the hidden part of a deleted widget")
+            if _FEATURE:
+                widget.delete_later()
+            else:
+                widget.deleteLater()
+
+    # ----------------------------------------------------------------------
+    def _shown(self, entry):
+        """"""
+        if entry in self._parts and on_screen(entry[1]):
+            self._parts.remove(entry)
+            self._attach(entry)
+            self.done += 1
+
+    # ----------------------------------------------------------------------
+    def _report(self):
+        """"""
+        global _RUNNING
+
+        self.progress.emit(self.done, self.total)
+        if self._parts or self._hidden:
+            self._timer.start()
+            return
+        if _RUNNING is self:
+            _RUNNING = None
+        self.finished.emit()
+
+
+# ----------------------------------------------------------------------
+def on_screen(window):
+    """Whether `window` is shown and not minimized."""
+    try:
+        if _FEATURE:
+            return window.visible and not window.minimized
+        return window.isVisible() and not window.isMinimized()
+    except RuntimeError:
+        return False
+
+
+# ----------------------------------------------------------------------
+def hidden_parts(window):
+    """Return the (container, widget) pairs of the hidden parts of a window
+    on screen: the pages of its stacked widgets on screen that are not
+    shown, and the contents of its closed dock widgets.
+    """
+    parts = []
+    if _FEATURE:
+        for stack in window.find_children(QtWidgets.QStackedWidget):
+            if stack.visible:
+                current = stack.current_widget()
+                for index in range(stack.count):
+                    if stack.widget(index) is not current:
+                        parts.append((stack, stack.widget(index)))
+        for dock in window.find_children(QtWidgets.QDockWidget):
+            if not dock.visible and dock.widget() is not None:
+                parts.append((dock, dock.widget()))
+    else:
+        for stack in window.findChildren(QtWidgets.QStackedWidget):
+            if stack.isVisible():
+                current = stack.currentWidget()
+                for index in range(stack.count()):
+                    if stack.widget(index) is not current:
+                        parts.append((stack, stack.widget(index)))
+        for dock in window.findChildren(QtWidgets.QDockWidget):
+            if not dock.isVisible() and dock.widget() is not None:
+                parts.append((dock, dock.widget()))
+    # Those inside a hidden page are styled along with it
+    return [
+        (container, widget)
+        for container, widget in parts
+        if not any(
+            widget is not other and _inside(container, other)
+            for _, other in parts
+        )
+    ]
+
+
+# ----------------------------------------------------------------------
+def _inside(widget, ancestor):
+    """Whether `widget` is `ancestor` or one of its descendants."""
+    if _FEATURE:
+        return widget is ancestor or ancestor.is_ancestor_of(widget)
+    return widget is ancestor or ancestor.isAncestorOf(widget)
+
+
+# ----------------------------------------------------------------------
+def reset_windows():
+    """Stop the progressive apply running, if any, and take the stylesheet
+    off the windows it styled, for one set on the application to apply.
+    """
+    if _RUNNING is not None:
+        _RUNNING.cancel()
+
+    for window in QtWidgets.QApplication.topLevelWidgets():
+        if _FEATURE:
+            if window.property(STYLED):
+                window.style_sheet = ""
+                window.set_property(STYLED, None)
+                window.set_property(FINGERPRINT, None)
+        elif window.property(STYLED):
+            window.setStyleSheet("")
+            window.setProperty(STYLED, None)
+            window.setProperty(FINGERPRINT, None)
@@ -0,0 +1,152 @@
+"""Transformations of rendered Qt stylesheets."""
+
+import functools
+import re
+
+_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_RULE = re.compile(r"([^{}]+)\{([^{}]*)\}")
+_TOKEN = re.compile(
+    r"""("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')|(/\*.*?\*/)|(\s+)|([^\s"'/]+|/)""",
+    re.S,
+)
+# Numbers and hex colors in declarations, like `0.50` and `#AABBCC`
+_NUMBER = re.compile(r"(?<![\w.#])(\d*)\.(\d+)")
+_COLOR = re.compile(r"#([0-9a-fA-F]{8}|[0-9a-fA-F]{6}|[0-9a-fA-F]{3})(?![\w-])")
+_EMPTY = re.compile(r"(?:^|(?<=\}))[^{}]+\{\}")
+# Whitespace is dropped next to these, and around `:` in declarations
+_TIGHT_AFTER = frozenset("{};,>(")
+_TIGHT_BEFORE = frozenset("{};,>)")
+# First name of every compound selector, like QTabBar in `QTabBar::tab`
+_TYPE = re.compile(r"(?:^|(?<=[\s>+~]))\.?([A-Za-z_][\w-]*)")
+
+# Widgets Qt creates on demand, they are missing from a scan of the live
+# widget tree until they are first shown.
+IMPLIED = {
+    "QAbstractScrollArea": {"QScrollBar", "QWidget"},
+    "QAbstractSpinBox": {"QLineEdit", "QMenu"},
+    "QComboBox": {"QAbstractItemView", "QListView", "QFrame", "QScrollBar"},
+    "QDateTimeEdit": {"QCalendarWidget", "QMenu", "QTableView", "QToolButton"},
+    "QLineEdit": {"QMenu"},
+    "QMainWindow": {"QMenu", "QSplitter", "QToolButton"},
+    "QPlainTextEdit": {"QMenu"},
+    "QTabBar": {"QToolButton"},
+    "QTextEdit": {"QMenu"},
+    "QToolBar": {"QToolButton"},
+}
+# Selectors matching widgets no scan can see.
+ALWAYS = {"QToolTip"}
+
+
+# ----------------------------------------------------------------------
+def parse_rules(stylesheet):
+    """Return the (selectors, body) rules of `stylesheet`, in order."""
+    return [
+        (
+            [selector.strip() for selector in match.group(1).split(",")],
+            match.group(2),
+        )
+        for match in _RULE.finditer(_COMMENT.sub("", stylesheet))
+    ]
+
+
+# ----------------------------------------------------------------------
+def selector_types(selector):
+    """Return the Qt class names a selector requires, `*` needs none."""
+    return {name for name in _TYPE.findall(selector) if name.startswith("Q")}
+
+
+# ----------------------------------------------------------------------
+@functools.lru_cache(maxsize=8)
+def _prune(stylesheet, classes):
+    """"""
+    rules = []
+    for selectors, body in parse_rules(stylesheet):
+        selectors = [s for s in selectors if selector_types(s) <= classes]
+        if selectors:
+            rules.append(f"{', '.join(selectors)} {{{body}}}")
+    return "\n".join(rules)
+
+
+# ----------------------------------------------------------------------
+def prune_stylesheet(stylesheet, classes):
+    """Keep only the rules of `stylesheet` that can match `classes`.
+
+    `classes` must hold every class name of every styled widget, base
+    classes included, a selector is dropped when it names a Qt class not
+    in it. Comments are dropped too.
+    """
+    return _prune(stylesheet, frozenset(classes) | ALWAYS)
+
+
+# ----------------------------------------------------------------------
+def count_rules(stylesheet):
+    """Number of (rule, selector) pairs Qt has to match for every widget."""
+    return sum(len(selectors) for selectors, _ in parse_rules(stylesheet))
+
+
+# ----------------------------------------------------------------------
+@functools.lru_cache(maxsize=8)
+def minify_stylesheet(stylesheet):
+    """Return `stylesheet` without comments, spacing and empty rules.
+
+    Quoted strings are kept as they are, numbers lose their redundant
+    zeros, `0.50` is `.5`, and hex colors are lowercased and shortened,
+    `#AABBCC` is `#abc`, only inside declarations, where `#` can not be
+    an object name.
+    """
+    out = []
+    space = False
+    declarations = False
+    for match in _TOKEN.finditer(stylesheet):
+        string, comment, whitespace, text = match.groups()
+        if comment is not None:
+            continue
+        if whitespace is not None:
+            space = True
+            continue
+
+        if string is None and declarations:
+            text = _NUMBER.sub(_number, text)
+            text = _COLOR.sub(_color, text)
+        token = string if string is not None else text
+
+        if space and out:
+            previous, next_ = out[-1][-1], token[0]
+            tight = (
+                previous in _TIGHT_AFTER
+                or next_ in _TIGHT_BEFORE
+                or (declarations and ":" in (previous, next_))
+            )
+            if not tight:
+                out.append(" ")
+        space = False
+
+        if string is None:
+            for char in text:
+                if char == "{":
+                    declarations = True
+                elif char == "}":
+                    declarations = False
+        out.append(token)
+
+    stylesheet = "".join(out)
+    while ";;" in stylesheet:
+        stylesheet = stylesheet.replace(";;", ";")
+    stylesheet = stylesheet.replace("{;", "{").replace(";}", "}")
+    return _EMPTY.sub("", stylesheet)
+
+
+# ----------------------------------------------------------------------
+def _number(match):
+    """"""
+    integer, fraction = match.groups()
+    return f"{integer.lstrip('0')}.{fraction.rstrip('0') or '0'}"
+
+
+# ----------------------------------------------------------------------
+def _color(match):
+    """"""
+    color = match.group(1).lower()
+    if len(color) == 6 and color[::2] == color[1::2]:
+        color = color[::2]
+    return f"#{color}"
@@ -7,20 +7,29 @@ if "PySide6" in sys.modules:
 elif "PyQt6" in sys.modules:
     from PyQt6 import uic
 
-from ..qt_material6 import (
+from . import (
     _FEATURE,
     QtCore,
     QtGui,
     QtWidgets,
     apply_stylesheet,
     list_themes,
+    rebuild_planner,
 )
+from .builder import ThemeBuilder
+from .state import theme_state
+from .theme import Theme
 
 
 class QtStyleTools:
     """"""
 
     extra_values = {}
+    # Milliseconds between two live previews of the color dialog
+    preview_interval = 16
+    # Intervals a live preview waits for the previous build, at most,
+    # before it supersedes it
+    preview_waits = 30
 
     @deprecated("set_extra")
     def set_extra_colors(self, extra):
@@ -94,6 +103,10 @@ class QtStyleTools:
         self, parent, theme, invert_secondary=False, extra=None, callable_=None
     ):
         """"""
+        # A theme still building in the background must not override this one
+        if getattr(self, "theme_builder_", None) is not None:
+            self.theme_builder_.cancel()
+
         if theme == "default":
             if _FEATURE:
                 parent.style_sheet = ""
@@ -113,6 +126,29 @@ class QtStyleTools:
         if callable_:
             callable_()
 
+    def apply_stylesheet_async(
+        self, parent, theme, invert_secondary=False, extra=None, callable_=None
+    ):
+        """Like `apply_stylesheet`, but build the theme on a worker thread.
+
+        The GUI stays responsive while the icons and the stylesheet are
+        generated, a request made before the previous one was applied
+        supersedes it.
+        """
+        if theme == "default":
+            self.apply_stylesheet(parent, theme, callable_=callable_)
+            return
+
+        if getattr(self, "theme_builder_", None) is None:
+            self.theme_builder_ = ThemeBuilder(parent)
+        self.theme_builder_.apply(
+            parent,
+            theme=theme,
+            invert_secondary=invert_secondary,
+            extra=extra,
+            callable_=callable_,
+        )
+
     def update_theme_event(self, parent):
         """"""
         if _FEATURE:
@@ -140,7 +176,7 @@ class QtStyleTools:
 
         self.extra_values["density_scale"] = density
 
-        self.apply_stylesheet(
+        self.apply_stylesheet_async(
             parent,
             theme=theme,
             invert_secondary=theme.startswith("light"),
@@ -153,23 +189,23 @@ class QtStyleTools:
         if not hasattr(self, "colors"):
             return
 
-        theme = {
-            color_: os.environ[f"QTMATERIAL_{color_.upper()}"]
-            for color_ in self.colors
-        }
+        state = theme_state()
+        if state.name is None:
+            return
+        theme = {color_: state.color(color_) for color_ in self.colors}
 
         if _FEATURE:
-            if "light" in os.environ["QTMATERIAL_THEME"]:
+            if "light" in state.name:
                 # noinspection PyUnresolvedReferences
                 self.dock_theme.checkBox_light_theme.checked = True
-            elif "dark" in os.environ["QTMATERIAL_THEME"]:
+            elif "dark" in state.name:
                 # noinspection PyUnresolvedReferences
                 self.dock_theme.checkBox_light_theme.checked = False
         else:
-            if "light" in os.environ["QTMATERIAL_THEME"]:
+            if "light" in state.name:
                 # noinspection PyUnresolvedReferences
                 self.dock_theme.checkBox_light_theme.setChecked(True)
-            elif "dark" in os.environ["QTMATERIAL_THEME"]:
+            elif "dark" in state.name:
                 # noinspection PyUnresolvedReferences
                 self.dock_theme.checkBox_light_theme.setChecked(False)
 
@@ -225,20 +261,6 @@ class QtStyleTools:
 
     def update_theme(self, parent):
         """"""
-        with open("my_theme.xml", "w") as file:
-            file.write(
-                """
-            <resources>
-                <color name="primaryColor">{primaryColor}</color>
-                <color name="primaryLightColor">{primaryLightColor}</color>
-                <color name="secondaryColor">{secondaryColor}</color>
-                <color name="secondaryLightColor">{secondaryLightColor}</color>
-                <color name="secondaryDarkColor">{secondaryDarkColor}</color>
-                <color name="primaryTextColor">{primaryTextColor}</color>
-                <color name="secondaryTextColor">{secondaryTextColor}</color>
-              </resources>
-            """.format(**self.custom_colors)
-            )
         if _FEATURE:
             # noinspection PyUnresolvedReferences
             light = self.dock_theme.checkBox_light_theme.checked
@@ -246,9 +268,9 @@ class QtStyleTools:
             # noinspection PyUnresolvedReferences
             light = self.dock_theme.checkBox_light_theme.isChecked()
 
-        self.apply_stylesheet(
+        self.apply_stylesheet_async(
             parent,
-            "my_theme.xml",
+            Theme.from_dict(self.custom_colors, name="my_theme"),
             invert_secondary=light,
             extra=self.extra_values,
             callable_=self.update_buttons,
@@ -264,29 +286,124 @@ class QtStyleTools:
                 color_dialog.current_color = initial
             else:
                 color_dialog.setCurrentColor(initial)
+
+            restore = self.preview_snapshot(parent)
+            preview = self.live_preview(parent, button_, color_dialog)
+            color_dialog.currentColorChanged.connect(preview)
             done = color_dialog.exec_()
+            preview(None)
 
             if _FEATURE:
                 color_ = color_dialog.current_color
                 if done and color_.is_valid():
-                    rgb_255 = [color_.red(), color_.green(), color_.blue()]
-                    color = "#" + "".join(
-                        [hex(v)[2:].ljust(2, "0") for v in rgb_255]
-                    )
-                    self.custom_colors[button_] = color
+                    self.custom_colors[button_] = self.color_name(color_)
                     self.update_theme(parent)
+                    return
             else:
                 color_ = color_dialog.currentColor()
                 if done and color_.isValid():
-                    rgb_255 = [color_.red(), color_.green(), color_.blue()]
-                    color = "#" + "".join(
-                        [hex(v)[2:].ljust(2, "0") for v in rgb_255]
-                    )
-                    self.custom_colors[button_] = color
+                    self.custom_colors[button_] = self.color_name(color_)
                     self.update_theme(parent)
+                    return
+            restore()
 
         return iner
 
+    def color_name(self, color):
+        """"""
+        rgb_255 = [color.red(), color.green(), color.blue()]
+        return "#" + "".join([hex(v)[2:].ljust(2, "0") for v in rgb_255])
+
+    def live_preview(self, parent, button_, owner):
+        """Return a slot previewing the colors picked for `button_`.
+
+        Changes are coalesced: at most one build starts per
+        `preview_interval` milliseconds, and none while the previous one is
+        still running, for up to `preview_waits` intervals. The last color
+        picked is always previewed. Icons are kept in memory and nothing is
+        written to disk. Calling the slot with None stops the previews.
+        """
+        picked = {}
+        waits = [0]
+        timer = QtCore.QTimer(owner)
+        if _FEATURE:
+            timer.single_shot = True
+            timer.interval = self.preview_interval
+        else:
+            timer.setSingleShot(True)
+            timer.setInterval(self.preview_interval)
+
+        def build():
+            if getattr(self, "theme_builder_", None) is None:
+                self.theme_builder_ = ThemeBuilder(parent)
+            if self.theme_builder_.pending() and waits[0] < self.preview_waits:
+                waits[0] += 1
+                timer.start()
+                return
+            waits[0] = 0
+
+            if _FEATURE:
+                # noinspection PyUnresolvedReferences
+                light = self.dock_theme.checkBox_light_theme.checked
+            else:
+                # noinspection PyUnresolvedReferences
+                light = self.dock_theme.checkBox_light_theme.isChecked()
+
+            colors = dict(self.custom_colors)
+            colors[button_] = self.color_name(picked["color"])
+            self.theme_builder_.apply(
+                parent,
+                theme=Theme.from_dict(colors, name="my_theme"),
+                invert_secondary=light,
+                extra=self.extra_values,
+                in_memory_icons=True,
+                fonts=False,
+            )
+
+        def changed(color):
+            if color is None:
+                timer.stop()
+                return
+            picked["color"] = color
+            if _FEATURE:
+                if not timer.active:
+                    timer.start()
+            elif not timer.isActive():
+                timer.start()
+
+        timer.timeout.connect(build)
+        return changed
+
+    def preview_snapshot(self, parent):
+        """Return a callable undoing every preview applied since."""
+        if _FEATURE:
+            stylesheet = parent.style_sheet
+            search_paths = QtCore.QDir.search_paths("icon")
+        else:
+            stylesheet = parent.styleSheet()
+            search_paths = QtCore.QDir.searchPaths("icon")
+        palette = QtGui.QGuiApplication.palette()
+        state = theme_state()
+        name, colors = state.name, state.colors
+
+        def restore():
+            if getattr(self, "theme_builder_", None) is not None:
+                self.theme_builder_.cancel()
+            if name is not None:
+                state.update(name, colors)
+            # The icons and palette are no longer those of the last apply
+            rebuild_planner().forget()
+            if _FEATURE:
+                QtCore.QDir.set_search_paths("icon", search_paths)
+                QtGui.QGuiApplication.set_palette(palette)
+                parent.style_sheet = stylesheet
+            else:
+                QtCore.QDir.setSearchPaths("icon", search_paths)
+                QtGui.QGuiApplication.setPalette(palette)
+                parent.setStyleSheet(stylesheet)
+
+        return restore
+
     def show_dock_theme(self, parent):
         """"""
         self.colors = [
@@ -300,8 +417,7 @@ class QtStyleTools:
         ]
 
         self.custom_colors = {
-            v: os.environ.get(f"QTMATERIAL_{v.upper()}", "")
-            for v in self.colors
+            v: theme_state().color(v, "") for v in self.colors
         }
 
         if "PySide6" in sys.modules:
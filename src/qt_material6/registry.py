@@ -0,0 +1,175 @@
+import os
+import threading
+from dataclasses import dataclass
+
+THEMES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "themes")
+
+COLORS = (
+    "primaryColor",
+    "primaryLightColor",
+    "secondaryColor",
+    "secondaryLightColor",
+    "secondaryDarkColor",
+    "primaryTextColor",
+    "secondaryTextColor",
+)
+
+
+########################################################################
+@dataclass(frozen=True, slots=True)
+class ThemeRecord:
+    """A parsed theme file, `colors` holds its (name, value) pairs."""
+
+    name: str
+    path: str
+    colors: tuple
+    light: bool
+
+    # ----------------------------------------------------------------------
+    def as_dict(self):
+        """"""
+        return dict(self.colors)
+
+    # ----------------------------------------------------------------------
+    def color(self, role):
+        """"""
+        for name, value in self.colors:
+            if name == role:
+                return value
+        raise KeyError(role)
+
+
+########################################################################
+class ThemeRegistry:
+    """Index of the themes found in a set of directories.
+
+    Every directory is scanned and parsed once, and again only when its
+    mtime changed, lookups by name are plain dictionary accesses.
+    """
+
+    # ----------------------------------------------------------------------
+    def __init__(self, *directories):
+        """Constructor"""
+        self._lock = threading.RLock()
+        # directory -> (mtime, {file name: ThemeRecord}), in registration
+        # order, later directories take precedence.
+        self._directories = {}
+        self._files = {}
+        self._index = {}
+        self._names = ()
+        for directory in directories:
+            self._directories[os.path.abspath(directory)] = None
+
+    # ----------------------------------------------------------------------
+    def register_directory(self, directory):
+        """Add the themes in `directory`, they override earlier ones."""
+        with self._lock:
+            self._directories.pop(os.path.abspath(directory), None)
+            self._directories[os.path.abspath(directory)] = None
+            self.refresh()
+
+    # ----------------------------------------------------------------------
+    def refresh(self):
+        """Rescan the directories whose mtime changed since the last scan."""
+        with self._lock:
+            changed = False
+            for directory, scanned in self._directories.items():
+                try:
+                    mtime = os.stat(directory).st_mtime_ns
+                except OSError:
+                    mtime = None
+                if scanned is not None and scanned[0] == mtime:
+                    continue
+                self._directories[directory] = (mtime, scan(directory))
+                changed = True
+
+            if changed or not self._index:
+                index = {}
+                names = set()
+                for _, records in self._directories.values():
+                    for filename, record in records.items():
+                        index[filename] = record
+                        index[record.name] = record
+                        names.add(filename)
+                self._names = tuple(sorted(names))
+                self._index = index
+
+    # ----------------------------------------------------------------------
+    def get(self, name):
+        """Return the record of the theme `name`, with or without `.xml`."""
+        record = self._index.get(name)
+        if record is None:
+            # A miss may be a file added since the last scan.
+            self.refresh()
+            record = self._index.get(name)
+        return record
+
+    # ----------------------------------------------------------------------
+    def load(self, path):
+        """Return the record of the theme file at `path`, or None."""
+        path = os.path.abspath(path)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        cached = self._files.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, parse_theme(path))
+            self._files[path] = cached
+        return cached[1]
+
+    # ----------------------------------------------------------------------
+    def names(self):
+        """Sorted file names of every registered theme."""
+        if not self._index:
+            self.refresh()
+        return list(self._names)
+
+    # ----------------------------------------------------------------------
+    def __contains__(self, name):
+        """"""
+        return self.get(name) is not None
+
+
+# ----------------------------------------------------------------------
+def scan(directory):
+    """Parse every theme in `directory`, keyed by file name."""
+    try:
+        files = os.listdir(directory)
+    except OSError:
+        return {}
+    return {
+        filename: parse_theme(os.path.join(directory, filename))
+        for filename in files
+        if filename.endswith("xml")
+    }
+
+
+# ----------------------------------------------------------------------
+def parse_theme(path):
+    """Read the `<color>` elements of the theme file at `path`."""
+    from xml.etree import ElementTree
+
+    colors = tuple(
+        (element.get("name"), (element.text or "").strip())
+        for element in ElementTree.parse(path).iter("color")
+    )
+    name = os.path.splitext(os.path.basename(path))[0]
+    return ThemeRecord(name, path, colors, is_light(name, dict(colors)))
+
+
+# ----------------------------------------------------------------------
+def is_light(name, colors):
+    """Whether a theme is light, from its name or else its background."""
+    if name.startswith("light"):
+        return True
+    if name.startswith("dark"):
+        return False
+
+    background = colors.get("secondaryColor", "#000000")
+    r, g, b = (int(background[i : i + 2], 16) for i in range(1, 6, 2))
+    return 0.299 * r + 0.587 * g + 0.114 * b > 127.5
+
+
+THEME_REGISTRY = ThemeRegistry(THEMES_PATH)
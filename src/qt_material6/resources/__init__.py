@@ -1,3 +1,23 @@
-from .generate import RESOURCES_PATH, ResourseGenerator
+from .generate import (
+    CACHE_PATH,
+    RESOURCES_PATH,
+    STORE_PATH,
+    ResourseGenerator,
+    disk_usage,
+    icon_cache_clear,
+    memory_sets,
+    shutdown_pools,
+    store_stats,
+)
 
-__all__ = [RESOURCES_PATH, ResourseGenerator]
+__all__ = [
+    CACHE_PATH,
+    RESOURCES_PATH,
+    STORE_PATH,
+    ResourseGenerator,
+    disk_usage,
+    icon_cache_clear,
+    memory_sets,
+    shutdown_pools,
+    store_stats,
+]
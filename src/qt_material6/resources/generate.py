@@ -1,15 +1,62 @@
+import atexit
+import hashlib
 import os
 import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from .rcc import compile_rcc
+from .recolor import BACKGROUND, TRANSPARENT, icon_recolorer, recolorer
+
 HOME = Path.home()
 RESOURCES_PATH = os.path.join(HOME, ".qt_material6")
+CACHE_PATH = os.path.join(RESOURCES_PATH, "cache")
+# Every recolored icon is stored once here, named after its content, and
+# hardlinked into the `CACHE_PATH` entries that use it.
+STORE_PATH = os.path.join(RESOURCES_PATH, "store")
+MEMORY_ROOT = "/qt_material6"
+
+# Memory icon sets kept registered with Qt, each theme uses three. Past it
+# the least recently used ones are unregistered and dropped.
+MEMORY_SETS = 12
+
+# Bump whenever the generated output changes for the same inputs, so stale
+# entries in `CACHE_PATH` are never reused.
+GENERATOR_VERSION = 2
+
+_SOURCES = {}
+_CACHED = set()
+# Compiled memory icon sets by resource root, and those registered with
+# Qt, which does not copy them so they must stay alive until unregistered.
+_BUNDLES = OrderedDict()
+_REGISTERED = OrderedDict()
+_BUNDLES_LOCK = threading.Lock()
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+# Icon files handled since the start or `store_stats(reset=True)`
+_STATS = {"written": 0, "linked": 0, "copied": 0}
+_STATS_LOCK = threading.Lock()
 
 
 ########################################################################
 class ResourseGenerator:
     """"""
 
+    # Generate icon files concurrently, None, "thread" or "process". The
+    # process pool only pays off for large custom icon sets.
+    parallel = None
+    # Hardlink the icons of the `CACHE_PATH` entries from `STORE_PATH`
+    # instead of writing a copy of each into every entry, copies are made
+    # where links are not supported. Exports and `parent` folders get plain
+    # files unless `store` is given, as does everything when the store is
+    # not writable.
+    store = True
+
     # ----------------------------------------------------------------------
     def __init__(
         self,
@@ -18,8 +65,24 @@ class ResourseGenerator:
         disabled,
         source,
         parent="theme",
+        cache=False,
+        memory=False,
+        store=None,
     ):
-        """Constructor"""
+        """Constructor
+
+        With `cache` every icon set is stored once under `CACHE_PATH`, in a
+        folder named after its inputs, instead of being regenerated into
+        `parent`, as long as it can be written to; `search_paths` lists
+        the folders to register as `icon:`.
+
+        With `memory` nothing is written at all, `generate` compiles the
+        icon sets into resource bundles kept in `bundles` that have to be
+        registered with `QResource.registerResourceData` under their root.
+
+        With `store` the icons are linked from `STORE_PATH`, into `parent`
+        too, see the class attribute for the default.
+        """
 
         if parent.startswith("/"):
             self.index = parent
@@ -30,57 +93,397 @@ class ResourseGenerator:
 
         active = "#707070"
 
+        self.source = source
+        self.secondary = secondary
+        self.memory = memory
+        # Written to `parent` instead when the cache cannot be written to
+        self.cache = memory or (cache and _writable(CACHE_PATH))
+        if store is None:
+            store = self.store and self.cache
+        self.store = store
+        self.bundles = []
+
+        if self.cache:
+            digest = source_digest(source)
+            self.search_paths = []
+            self.contex = []
+            for folder, color in [
+                ("disabled", disabled),
+                ("primary", primary),
+                ("active", active),
+            ]:
+                key = cache_key(digest, folder, color, secondary)
+                if memory:
+                    path = f":{MEMORY_ROOT}/{key}"
+                    self.contex.append((f"{path}/{folder}", color))
+                else:
+                    path = os.path.join(CACHE_PATH, key)
+                    self.contex.append((os.path.join(path, folder), color))
+                self.search_paths.append(path)
+            return
+
+        self.search_paths = [self.index]
         self.contex = [
             (os.path.join(self.index, "disabled"), disabled),
             (os.path.join(self.index, "primary"), primary),
             (os.path.join(self.index, "active"), active),
         ]
 
-        self.source = source
-        self.secondary = secondary
-
         for folder, _ in self.contex:
             shutil.rmtree(folder, ignore_errors=True)
             os.makedirs(folder, exist_ok=True)
 
     # ----------------------------------------------------------------------
+    @property
+    def pending(self):
+        """Folders that still have to be generated."""
+        if not self.cache:
+            return [folder for folder, _ in self.contex]
+        if self.memory:
+            with _BUNDLES_LOCK:
+                return [
+                    folder
+                    for folder, _ in self.contex
+                    if _bundle(folder[1:].rsplit("/", 1)[0]) is None
+                ]
+
+        pending = []
+        for folder, _ in self.contex:
+            if folder in _CACHED:
+                continue
+            if not self.memory and os.path.isdir(folder):
+                _CACHED.add(folder)
+                continue
+            pending.append(folder)
+        return pending
 
+    # ----------------------------------------------------------------------
     def generate(self):
         """"""
-        for icon in os.listdir(self.source):
-            if not icon.endswith(".svg"):
+        if not self.cache:
+            self.render(self.contex)
+            return
+
+        if self.memory:
+            # Every set is listed, generated or not, as one dropped since
+            # has to be registered again
+            for folder, color in self.contex:
+                root, name = folder[1:].rsplit("/", 1)
+                with _BUNDLES_LOCK:
+                    bundle = _bundle(root)
+                if bundle is None:
+                    files = {
+                        f"{name}/{icon}": content.encode()
+                        for icon, content in self.recolor(color)
+                    }
+                    bundle = compile_rcc(files)
+                    with _BUNDLES_LOCK:
+                        bundle = _BUNDLES.setdefault(root, bundle)
+                        _evict()
+                self.bundles.append((root, bundle))
+            return
+
+        pending = self.pending
+        if not pending:
+            return
+
+        # Generate into a private staging folder and move it into place
+        # at the end, so a concurrent or interrupted run never exposes a
+        # half written icon set.
+        os.makedirs(CACHE_PATH, exist_ok=True)
+        staged = []
+        for folder, color in self.contex:
+            if folder not in pending:
                 continue
+            staging = tempfile.mkdtemp(prefix=".staging-", dir=CACHE_PATH)
+            name = os.path.basename(folder)
+            os.makedirs(os.path.join(staging, name))
+            staged.append(
+                (staging, folder, (os.path.join(staging, name), color))
+            )
 
-            with open(os.path.join(self.source, icon), "r") as file_input:
-                content_original = file_input.read()
+        self.render([contex for _, _, contex in staged])
 
-                for folder, color in self.contex:
-                    new_content = self.replace_color(content_original, color)
-                    new_content = self.replace_color(
-                        new_content, self.secondary, "#ff0000"
-                    )
+        for staging, folder, _ in staged:
+            try:
+                os.rename(staging, os.path.dirname(folder))
+            except OSError:
+                # Someone else finished the same set first.
+                shutil.rmtree(staging, ignore_errors=True)
+            _CACHED.add(folder)
 
-                    file_to_write = os.path.join(folder, icon)
-                    with open(file_to_write, "w") as file_output:
-                        file_output.write(new_content)
+    # ----------------------------------------------------------------------
+    def render(self, contex):
+        """Write the recolored icons for every (folder, color) in `contex`."""
+        icons = list(load_sources(self.source)[1].items())
+        store = None
+        if self.store and _writable(STORE_PATH):
+            store = STORE_PATH
+        if not self.parallel or len(icons) < 2:
+            _count(write_icons(icons, contex, self.secondary, store))
+            return
+
+        pool = worker_pool(self.parallel)
+        chunks = (os.cpu_count() or 1) * 4
+        size = -(-len(icons) // chunks)
+        futures = [
+            pool.submit(
+                write_icons, icons[i : i + size], contex, self.secondary, store
+            )
+            for i in range(0, len(icons), size)
+        ]
+        for future in futures:
+            _count(future.result())
+
+    # ----------------------------------------------------------------------
+    def recolor(self, color):
+        """Yield the name and content of every icon drawn with `color`."""
+        engine = icon_recolorer(color, self.secondary)
+        for icon, content_original in load_sources(self.source)[1].items():
+            yield icon, engine(content_original)
 
     # ----------------------------------------------------------------------
     def replace_color(self, content, replace, color="#0000ff"):
         """"""
-        colors = [color] + [
-            "".join(list(color)[:i] + ["\\\n"] + list(color)[i:])
-            for i in range(1, 7)
-        ]
-        for c in colors:
-            content = content.replace(c, replace)
-
-        replace = "#ffffff00"
-        color = "#000000"
-        colors = [color] + [
-            "".join(list(color)[:i] + ["\\\n"] + list(color)[i:])
-            for i in range(1, 7)
-        ]
-        for c in colors:
-            content = content.replace(c, replace)
+        return recolorer((color, replace), (BACKGROUND, TRANSPARENT))(content)
+
+
+# ----------------------------------------------------------------------
+def write_icons(icons, contex, secondary, store=None):
+    """Write the (name, content) `icons` to every (folder, color) in `contex`.
+
+    With `store` every icon is linked from there, see `store_icon`.
+    Returns the number of files written, linked and copied. Module level,
+    so it can run in a worker process.
+    """
+    engines = [
+        (folder, icon_recolorer(color, secondary)) for folder, color in contex
+    ]
+    stats = {"written": 0, "linked": 0, "copied": 0}
+    for icon, content in icons:
+        for folder, engine in engines:
+            path = os.path.join(folder, icon)
+            if store is None:
+                with open(path, "w") as file_output:
+                    file_output.write(engine(content))
+                stats["written"] += 1
+                continue
+            written, action = store_icon(engine(content).encode(), path, store)
+            stats["written"] += written
+            stats[action] += 1
+    return stats
+
+
+# ----------------------------------------------------------------------
+def store_icon(content, path, store=STORE_PATH):
+    """Link `path` to the copy of `content` in `store`, writing it first
+    if it is not there yet.
+
+    Returns 1 if the store was written to, else 0, and "linked" or
+    "copied" when the file system does not support hardlinks.
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    stored = os.path.join(store, digest[:2], f"{digest}.svg")
+
+    written = 0
+    if not os.path.exists(stored):
+        os.makedirs(os.path.dirname(stored), exist_ok=True)
+        staging = f"{stored}.{os.getpid()}.{threading.get_ident()}"
+        with open(staging, "wb") as file_output:
+            file_output.write(content)
+        os.replace(staging, stored)
+        written = 1
 
-        return content
+    # Replaced, never written through, that would change the stored copy
+    if os.path.lexists(path):
+        os.unlink(path)
+    try:
+        os.link(stored, path)
+        return written, "linked"
+    except OSError:
+        shutil.copyfile(stored, path)
+        return written, "copied"
+
+
+# ----------------------------------------------------------------------
+def _writable(path):
+    """Whether files can be created in the folder `path`, made if needed."""
+    try:
+        os.makedirs(path, exist_ok=True)
+    except OSError:
+        return False
+    return os.access(path, os.W_OK)
+
+
+# ----------------------------------------------------------------------
+def store_stats(reset=False):
+    """Return the number of icon files written, linked and copied."""
+    with _STATS_LOCK:
+        stats = dict(_STATS)
+        if reset:
+            for key in _STATS:
+                _STATS[key] = 0
+    return stats
+
+
+# ----------------------------------------------------------------------
+def register_bundles(bundles, register, unregister):
+    """Register the memory icon sets `bundles`, (root, bundle) pairs, that
+    are not yet, and unregister the least recently used others past
+    `MEMORY_SETS`. `register` and `unregister` are those of QResource, the
+    caller runs on the GUI thread.
+    """
+    with _BUNDLES_LOCK:
+        for root, bundle in bundles:
+            if root not in _REGISTERED:
+                register(bundle, root)
+                _REGISTERED[root] = bundle
+            _REGISTERED.move_to_end(root)
+            _BUNDLES.pop(root, None)
+
+        in_use = {root for root, _ in bundles}
+        stale = [root for root in _REGISTERED if root not in in_use]
+        for root in stale[: max(0, len(_REGISTERED) - MEMORY_SETS)]:
+            unregister(_REGISTERED.pop(root), root)
+
+
+# ----------------------------------------------------------------------
+def memory_sets():
+    """Number of memory icon sets held, and of those registered with Qt."""
+    with _BUNDLES_LOCK:
+        return len(_BUNDLES) + len(_REGISTERED), len(_REGISTERED)
+
+
+# ----------------------------------------------------------------------
+def icon_cache_clear():
+    """Forget the icon sets generated so far, they are generated again on
+    next use. Memory sets registered with Qt are kept until unregistered.
+    """
+    _CACHED.clear()
+    with _BUNDLES_LOCK:
+        _BUNDLES.clear()
+
+
+# ----------------------------------------------------------------------
+def _bundle(root):
+    """The compiled memory set of `root`, or None, under the lock."""
+    bundle = _REGISTERED.get(root)
+    if bundle is None:
+        bundle = _BUNDLES.get(root)
+    return bundle
+
+
+# ----------------------------------------------------------------------
+def _evict():
+    """Drop the oldest sets not registered past `MEMORY_SETS`, under the
+    lock.
+    """
+    while len(_BUNDLES) > MEMORY_SETS:
+        _BUNDLES.popitem(last=False)
+
+
+# ----------------------------------------------------------------------
+def disk_usage(*paths):
+    """Bytes used by the files under `paths`, hardlinks counted once."""
+    inodes = {}
+    for path in paths:
+        for root, _, files in os.walk(path):
+            for name in files:
+                stat = os.lstat(os.path.join(root, name))
+                inodes[(stat.st_dev, stat.st_ino)] = stat.st_size
+    return sum(inodes.values())
+
+
+# ----------------------------------------------------------------------
+def _count(stats):
+    """"""
+    with _STATS_LOCK:
+        for key, value in stats.items():
+            _STATS[key] += value
+
+
+# ----------------------------------------------------------------------
+def worker_pool(kind="thread"):
+    """Return the shared executor of `kind`, created on first use.
+
+    Pools live until `shutdown_pools`, which also runs at exit, so theme
+    switches do not pay for starting workers again.
+    """
+    with _POOLS_LOCK:
+        pool = _POOLS.get(kind)
+        if pool is not None:
+            return pool
+
+        if kind == "thread":
+            pool = ThreadPoolExecutor(thread_name_prefix="qt_material6")
+        elif kind == "process":
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # Forking a process that already runs Qt is not safe.
+            pool = ProcessPoolExecutor(
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            raise ValueError(f"Unknown worker pool '{kind}'")
+        _POOLS[kind] = pool
+        return pool
+
+
+# ----------------------------------------------------------------------
+def shutdown_pools(wait=True):
+    """Stop the worker pools, later generations start new ones."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait)
+
+
+atexit.register(shutdown_pools)
+
+
+# ----------------------------------------------------------------------
+def load_sources(source):
+    """Return the digest and contents of the SVG files in `source`.
+
+    Both are read once and kept in memory until the folder mtime changes.
+    """
+    mtime = os.stat(source).st_mtime_ns
+    loaded = _SOURCES.get(source)
+    if loaded is not None and loaded[0] == mtime:
+        return loaded[1:]
+
+    sha = hashlib.sha256()
+    icons = {}
+    for icon in sorted(os.listdir(source)):
+        if not icon.endswith(".svg"):
+            continue
+        with open(os.path.join(source, icon), "r") as file_input:
+            icons[icon] = file_input.read()
+        sha.update(icon.encode())
+        sha.update(icons[icon].encode())
+
+    _SOURCES[source] = (mtime, sha.hexdigest(), icons)
+    return _SOURCES[source][1:]
+
+
+# ----------------------------------------------------------------------
+def source_digest(source):
+    """Hash of the SVG files in `source`."""
+    return load_sources(source)[0]
+
+
+# ----------------------------------------------------------------------
+def cache_key(digest, folder, color, secondary):
+    """Name of the `CACHE_PATH` entry for one generated icon folder."""
+    key = "\0".join(
+        [
+            str(GENERATOR_VERSION),
+            digest,
+            folder,
+            color.lower(),
+            secondary.lower(),
+        ]
+    )
+    return hashlib.sha256(key.encode()).hexdigest()[:24]
@@ -0,0 +1,165 @@
+"""Pure Python writer for the binary format of Qt's Resource Compiler.
+
+The output is what `rcc --binary` produces and can be handed straight to
+`QResource.registerResourceData`, no external `rcc` tool needed.
+"""
+
+import struct
+import zlib
+from collections import deque
+
+RCC_VERSION = 3
+
+# Flags of a tree node, see qresource.cpp
+COMPRESSED = 0x01
+DIRECTORY = 0x02
+
+# QLocale::AnyTerritory and QLocale::C
+_TERRITORY = 0
+_LANGUAGE = 1
+
+
+def qt_hash(name):
+    """Port of `qt_hash()`, the key Qt binary searches resource names by."""
+    encoded = name.encode("utf-16-be")
+    h = 0
+    for unit in struct.unpack(f">{len(encoded) // 2}H", encoded):
+        h = (h << 4) + unit
+        h ^= (h & 0xF0000000) >> 23
+        h &= 0x0FFFFFFF
+    return h
+
+
+def compile_sections(files, compress=True, version=RCC_VERSION):
+    """Return the (tree, names, data) sections holding `files`.
+
+    `files` maps resource paths like "primary/close.svg" to their bytes.
+    """
+    root = {}
+    for path, content in files.items():
+        parts = [part for part in path.split("/") if part]
+        node = root
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = content
+
+    names = bytearray()
+    data = bytearray()
+    name_offsets = {}
+
+    def name_offset(name):
+        if name not in name_offsets:
+            name_offsets[name] = len(names)
+            encoded = name.encode("utf-16-be")
+            names.extend(struct.pack(">HI", len(encoded) // 2, qt_hash(name)))
+            names.extend(encoded)
+        return name_offsets[name]
+
+    def data_offset(content):
+        offset = len(data)
+        flags = 0
+        if compress:
+            packed = struct.pack(">I", len(content)) + zlib.compress(content, 9)
+            if len(packed) < len(content):
+                content = packed
+                flags = COMPRESSED
+        data.extend(struct.pack(">I", len(content)))
+        data.extend(content)
+        return offset, flags
+
+    # Nodes are laid out breadth first, the children of a directory are
+    # contiguous and sorted by hash.
+    tree = bytearray()
+    stamp = struct.pack(">Q", 0) if version >= 2 else b""
+    queue = deque([(0, root)])
+    count = 1
+    while queue:
+        offset, node = queue.popleft()
+        if isinstance(node, dict):
+            children = sorted(node.items(), key=lambda i: qt_hash(i[0]))
+            tree.extend(
+                struct.pack(">IHII", offset, DIRECTORY, len(children), count)
+            )
+            for name, child in children:
+                queue.append((name_offset(name), child))
+            count += len(children)
+        else:
+            content_offset, flags = data_offset(bytes(node))
+            tree.extend(
+                struct.pack(
+                    ">IHhhI",
+                    offset,
+                    flags,
+                    _TERRITORY,
+                    _LANGUAGE,
+                    content_offset,
+                )
+            )
+        tree.extend(stamp)
+
+    return bytes(tree), bytes(names), bytes(data)
+
+
+def compile_rcc(files, compress=True, version=RCC_VERSION):
+    """Return `files` as a binary resource bundle, like `rcc --binary`."""
+    tree, names, data = compile_sections(files, compress, version)
+
+    header = 20 if version < 3 else 24
+    data_offset = header
+    names_offset = data_offset + len(data)
+    tree_offset = names_offset + len(names)
+
+    bundle = bytearray(b"qres")
+    bundle.extend(
+        struct.pack(">IIII", version, tree_offset, data_offset, names_offset)
+    )
+    if version >= 3:
+        bundle.extend(struct.pack(">I", 0))
+    bundle.extend(data)
+    bundle.extend(names)
+    bundle.extend(tree)
+    return bytes(bundle)
+
+
+# Source of the modules written by `rcc_module`
+_MODULE = """\
+# Resource object code (Python 3)
+# Created by: qt_material6, rcc version {version}
+# WARNING! All changes made in this file will be lost!
+
+import sys
+
+if "PyQt6" in sys.modules and "PySide6" not in sys.modules:
+    from PyQt6 import QtCore
+else:
+    from PySide6 import QtCore
+
+qt_resource_bundle = (
+{data}
+)
+
+
+def qInitResources():
+    QtCore.QResource.registerResourceData(qt_resource_bundle)
+
+
+def qCleanupResources():
+    QtCore.QResource.unregisterResourceData(qt_resource_bundle)
+
+
+qInitResources()
+"""
+
+
+def rcc_module(bundle, width=64):
+    """Return the source of a `*_rc.py` module registering `bundle`.
+
+    Unlike the modules of `pyside6-rcc`, the whole bundle is registered
+    with `QResource`, which PyQt6 has too, instead of its sections.
+    """
+    data = "\n".join(
+        f"    {bundle[start : start + width]!r}"
+        for start in range(0, len(bundle), width)
+    )
+    version = struct.unpack(">I", bundle[4:8])[0]
+    return _MODULE.format(version=version, data=data)
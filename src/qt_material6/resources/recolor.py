@@ -0,0 +1,67 @@
+import functools
+import re
+
+# Colors the source icons are drawn with
+PRIMARY = "#0000ff"
+SECONDARY = "#ff0000"
+BACKGROUND = "#000000"
+TRANSPARENT = "#ffffff00"
+
+
+########################################################################
+class Recolor:
+    """Replace several colors in a single pass over an SVG document.
+
+    Inkscape may break a color over two lines with a backslash, so every
+    color is also matched with a line continuation after each character.
+    """
+
+    __slots__ = ("lookup", "pattern")
+
+    # ----------------------------------------------------------------------
+    def __init__(self, mapping):
+        """Constructor"""
+        self.lookup = {}
+        for color, replace in mapping:
+            for variant in variants(color):
+                self.lookup.setdefault(variant, replace)
+
+        self.pattern = re.compile(
+            "|".join(
+                re.escape(variant)
+                for variant in sorted(self.lookup, key=len, reverse=True)
+            )
+        )
+
+    # ----------------------------------------------------------------------
+    def __call__(self, content):
+        """"""
+        return self.pattern.sub(self._replace, content)
+
+    # ----------------------------------------------------------------------
+    def _replace(self, match):
+        """"""
+        return self.lookup[match.group()]
+
+
+# ----------------------------------------------------------------------
+def variants(color):
+    """Return `color` and its spellings broken by a line continuation."""
+    return [color] + [color[:i] + "\\\n" + color[i:] for i in range(1, 7)]
+
+
+# ----------------------------------------------------------------------
+@functools.lru_cache(maxsize=64)
+def recolorer(*mapping):
+    """Return the shared `Recolor` for the (color, replace) pairs given."""
+    return Recolor(mapping)
+
+
+# ----------------------------------------------------------------------
+def icon_recolorer(color, secondary):
+    """Return the `Recolor` drawing a source icon with `color`."""
+    return recolorer(
+        (PRIMARY, color),
+        (SECONDARY, secondary),
+        (BACKGROUND, TRANSPARENT),
+    )
@@ -0,0 +1,264 @@
+"""Derive complete themes from one or two seed colors, in batches.
+
+Every step is array math over the whole batch, so thousands of themes cost
+about as much as a few. Needs NumPy, `pip install qt-material[seed]`, it is
+only imported once a theme is generated.
+"""
+
+from .registry import COLORS
+from .theme import Theme
+
+# L* of the secondary, secondaryLight and secondaryDark colors of the
+# bundled dark and light themes, like #232629, #4f5b62 and #31363b.
+DARK_TONES = (15.0, 37.0, 22.0)
+LIGHT_TONES = (96.5, 100.0, 91.0)
+# Fraction of the way to white the light primary is moved, in L*
+LIGHTEN = 0.4
+# Chroma of the neutrals tinted with the primary hue
+NEUTRAL_CHROMA = 4.0
+# WCAG AA contrast ratio for normal text
+MIN_CONTRAST = 4.5
+
+# Text colors tried first, the bundled ones, then black or white
+DARK_TEXT = {False: "#000000", True: "#3c3c3c"}
+SECONDARY_TEXT = {False: "#ffffff", True: "#555555"}
+
+# sRGB to XYZ, D65 white
+_XYZ = (
+    (0.4124564, 0.3575761, 0.1804375),
+    (0.2126729, 0.7151522, 0.0721750),
+    (0.0193339, 0.1191920, 0.9503041),
+)
+_WHITE = (0.95047, 1.0, 1.08883)
+
+
+# ----------------------------------------------------------------------
+def _numpy():
+    """"""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(
+            "Generating themes needs NumPy, "
+            "install it with `pip install qt-material[seed]`"
+        ) from None
+    return numpy
+
+
+# ----------------------------------------------------------------------
+def to_rgb(colors):
+    """Return `colors`, "#rrggbb" or "#rgb" strings or an (N, 3) array,
+    as floats in [0, 1] of shape (N, 3).
+    """
+    np = _numpy()
+    if isinstance(colors, str):
+        colors = [colors]
+    if isinstance(colors, np.ndarray) and colors.dtype != object:
+        rgb = colors.reshape(-1, 3).astype(float)
+        return rgb / 255 if rgb.max(initial=0) > 1 else rgb
+    digits = [color.lstrip("#")[:6] for color in colors]
+    try:
+        data = bytes.fromhex("".join(digits))
+    except ValueError:
+        data = b""
+    if len(data) != 3 * len(digits):
+        # Short or invalid colors, the fast path only takes "#rrggbb"
+        data = bytes.fromhex("".join(map(_digits, colors)))
+    return np.frombuffer(data, np.uint8).reshape(-1, 3) / 255
+
+
+# ----------------------------------------------------------------------
+def _digits(color):
+    """The six hex digits of "#rrggbb", "#rrggbbaa" or "#rgb"."""
+    digits = color.lstrip("#")
+    if len(digits) == 3:
+        digits = "".join(digit * 2 for digit in digits)
+    try:
+        if len(digits) in (6, 8):
+            bytes.fromhex(digits)
+            return digits[:6]
+    except ValueError:
+        pass
+    raise ValueError(f'{color!r} is not a "#rrggbb" or "#rgb" color')
+
+
+# ----------------------------------------------------------------------
+def to_hex(rgb):
+    """Return the "#rrggbb" strings of an (N, 3) array of [0, 1] floats."""
+    np = _numpy()
+    data = (np.clip(rgb, 0, 1) * 255).round().astype(np.uint8).tobytes()
+    data = data.hex()
+    return [f"#{data[i : i + 6]}" for i in range(0, len(data), 6)]
+
+
+# ----------------------------------------------------------------------
+def linear(rgb):
+    """"""
+    np = _numpy()
+    return np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+
+
+# ----------------------------------------------------------------------
+def gamma(rgb):
+    """"""
+    np = _numpy()
+    rgb = np.clip(rgb, 0, 1)
+    return np.where(
+        rgb <= 0.0031308, rgb * 12.92, 1.055 * rgb ** (1 / 2.4) - 0.055
+    )
+
+
+# ----------------------------------------------------------------------
+def to_lab(rgb):
+    """CIELAB of sRGB `rgb`, shape (N, 3)."""
+    np = _numpy()
+    xyz = linear(rgb) @ np.array(_XYZ).T / _WHITE
+    f = np.where(
+        xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29
+    )
+    return np.stack(
+        [
+            116 * f[:, 1] - 16,
+            500 * (f[:, 0] - f[:, 1]),
+            200 * (f[:, 1] - f[:, 2]),
+        ],
+        axis=1,
+    )
+
+
+# ----------------------------------------------------------------------
+def from_lab(lab):
+    """sRGB of CIELAB `lab`, clipped to the gamut."""
+    np = _numpy()
+    fy = (lab[:, 0] + 16) / 116
+    f = np.stack([fy + lab[:, 1] / 500, fy, fy - lab[:, 2] / 200], axis=1)
+    xyz = np.where(f > 6 / 29, f**3, 3 * (6 / 29) ** 2 * (f - 4 / 29))
+    return gamma(xyz * _WHITE @ np.linalg.inv(np.array(_XYZ)).T)
+
+
+# ----------------------------------------------------------------------
+def luminance(rgb):
+    """WCAG relative luminance of sRGB `rgb`."""
+    return linear(rgb) @ _XYZ[1]
+
+
+# ----------------------------------------------------------------------
+def contrast(rgb, other):
+    """WCAG contrast ratio between two arrays of sRGB colors."""
+    np = _numpy()
+    a, b = luminance(rgb), luminance(other)
+    return (np.maximum(a, b) + 0.05) / (np.minimum(a, b) + 0.05)
+
+
+# ----------------------------------------------------------------------
+def seed_colors(primary, secondary=None, light=False):
+    """Return {color name: (N, 3) sRGB array} derived from the seeds.
+
+    `primary` and `secondary` are N colors, see `to_rgb`, `light` one
+    bool or N of them. The light primary is the seed moved towards white
+    in L*. The secondary colors are neutrals tinted with the primary hue
+    at the tones of the bundled themes, or, with a `secondary` seed, that
+    color and two tones of its hue. The text colors are the bundled ones
+    unless they fall under `MIN_CONTRAST`, then black or white.
+    """
+    np = _numpy()
+    primary = to_rgb(primary)
+    count = len(primary)
+    light = np.broadcast_to(np.asarray(light, bool), (count,))[:, None]
+
+    lab = to_lab(primary)
+    lighter = lab.copy()
+    lighter[:, 0] += (100 - lighter[:, 0]) * LIGHTEN
+
+    if secondary is None:
+        neutral = lab.copy()
+        chroma = np.hypot(neutral[:, 1], neutral[:, 2])
+        scale = np.minimum(1, NEUTRAL_CHROMA / np.maximum(chroma, 1e-9))
+        neutral[:, 1:] *= scale[:, None]
+        tones = np.where(light, LIGHT_TONES, DARK_TONES)
+    else:
+        seed = to_rgb(secondary)
+        neutral = to_lab(np.broadcast_to(seed, (count, 3)))
+        offsets = np.where(
+            light,
+            np.subtract(LIGHT_TONES, LIGHT_TONES[0]),
+            np.subtract(DARK_TONES, DARK_TONES[0]),
+        )
+        tones = np.clip(neutral[:, :1] + offsets, 0, 100)
+
+    secondaries = []
+    for index in range(3):
+        tone = neutral.copy()
+        tone[:, 0] = tones[:, index]
+        secondaries.append(from_lab(tone))
+    if secondary is not None:
+        secondaries[0] = np.broadcast_to(seed, (count, 3))
+
+    black, white = to_rgb(["#000000", "#ffffff"])
+    dark_text = np.where(light, to_rgb(DARK_TEXT[True]), black)
+    text = np.where(light, to_rgb(SECONDARY_TEXT[True]), white)
+
+    primary_text = np.where(
+        (contrast(dark_text, primary) >= contrast(white, primary))[:, None],
+        dark_text,
+        white,
+    )
+    fallback = np.where(
+        (contrast(black, secondaries[0]) > contrast(white, secondaries[0]))[
+            :, None
+        ],
+        black,
+        white,
+    )
+    secondary_text = np.where(
+        (contrast(text, secondaries[0]) >= MIN_CONTRAST)[:, None],
+        text,
+        fallback,
+    )
+
+    return dict(
+        zip(
+            COLORS,
+            [
+                primary,
+                from_lab(lighter),
+                *secondaries,
+                primary_text,
+                secondary_text,
+            ],
+        )
+    )
+
+
+# ----------------------------------------------------------------------
+def seed_themes(primary, secondary=None, light=False, names=None):
+    """Return a `Theme` for every seed, see `seed_colors`.
+
+    The themes are named like the bundled ones, `dark_1de9b6`, unless
+    `names` are given.
+    """
+    np = _numpy()
+    colors = seed_colors(primary, secondary, light)
+    columns = [to_hex(colors[name]) for name in COLORS]
+    count = len(columns[0])
+    light = np.broadcast_to(np.asarray(light, bool), (count,)).tolist()
+    if names is None:
+        names = [
+            f"{'light' if is_light else 'dark'}_{color[1:]}"
+            for color, is_light in zip(columns[0], light)
+        ]
+    return [
+        Theme(name, tuple(zip(COLORS, values)), is_light)
+        for name, is_light, values in zip(names, light, zip(*columns))
+    ]
+
+
+# ----------------------------------------------------------------------
+def seed_theme(primary, secondary=None, light=False, name=None):
+    """Return the `Theme` of one seed, see `seed_colors`."""
+    return seed_themes(
+        [primary],
+        None if secondary is None else [secondary],
+        light,
+        None if name is None else [name],
+    )[0]
@@ -0,0 +1,116 @@
+"""The theme applied last, for widgets that paint with its colors."""
+
+import os
+
+from . import QtCore, QtGui
+from .builder import Signal
+from .registry import COLORS, is_light
+
+_STATE = None
+
+
+# ----------------------------------------------------------------------
+def theme_environ(name, colors):
+    """Return the `QTMATERIAL_*` variables of a theme, and its colors.
+
+    The variables `css_file` is formatted with, and that are exported to
+    the environment with `ThemeState.set_environ_export`.
+    """
+    environ = {color: colors[color] for color in COLORS}
+    for color in COLORS:
+        environ[f"QTMATERIAL_{color.upper()}"] = colors[color]
+    environ["QTMATERIAL_THEME"] = name
+    return environ
+
+
+########################################################################
+class ThemeState(QtCore.QObject):
+    """The name and colors of the theme applied last.
+
+    Updated on the GUI thread by every apply, `themeChanged` is emitted
+    with the new colors when they differ from the previous ones. The
+    environment is only written to once `set_environ_export` enabled it.
+    """
+
+    themeChanged = Signal(object)  # noqa: N815, Qt signal naming
+
+    # ----------------------------------------------------------------------
+    def __init__(self, parent=None):
+        """Constructor"""
+        super().__init__(parent)
+        self._name = None
+        self._colors = {}
+        self._environ_export = False
+
+    # ----------------------------------------------------------------------
+    @property
+    def name(self):
+        """Name of the theme, None before the first apply."""
+        return self._name
+
+    # ----------------------------------------------------------------------
+    @property
+    def light(self):
+        """"""
+        return self._name is not None and is_light(self._name, self._colors)
+
+    # ----------------------------------------------------------------------
+    @property
+    def colors(self):
+        """A copy of the {color name: "#rrggbb"} of the theme."""
+        return dict(self._colors)
+
+    # ----------------------------------------------------------------------
+    def color(self, name, default=None):
+        """Return the color `name`, like "primaryColor", as "#rrggbb"."""
+        return self._colors.get(name, default)
+
+    # ----------------------------------------------------------------------
+    def qcolor(self, name):
+        """Return the color `name` as a QColor, invalid if there is none."""
+        color = self._colors.get(name)
+        if color is None:
+            return QtGui.QColor()
+        return QtGui.QColor(color)
+
+    # ----------------------------------------------------------------------
+    def environ(self):
+        """Return the `QTMATERIAL_*` variables, see `theme_environ`."""
+        if self._name is None:
+            return {}
+        return theme_environ(self._name, self._colors)
+
+    # ----------------------------------------------------------------------
+    def update(self, name, colors):
+        """Make `colors` the current theme, returns whether it changed."""
+        colors = {color: colors[color] for color in COLORS}
+        if name == self._name and colors == self._colors:
+            return False
+
+        self._name = name
+        self._colors = colors
+        if self._environ_export:
+            os.environ.update(self.environ())
+        self.themeChanged.emit(self.colors)
+        return True
+
+    # ----------------------------------------------------------------------
+    def set_environ_export(self, enabled=True):
+        """Also write the `QTMATERIAL_*` variables to `os.environ`.
+
+        They are then inherited by child processes, as they were by
+        default before.
+        """
+        self._environ_export = enabled
+        if enabled:
+            os.environ.update(self.environ())
+
+
+# ----------------------------------------------------------------------
+def theme_state():
+    """Return the `ThemeState` of the application, created on first use."""
+    global _STATE
+
+    if _STATE is None:
+        _STATE = ThemeState()
+    return _STATE
@@ -0,0 +1,335 @@
+import copy
+import os
+import re
+import threading
+from pathlib import Path
+
+from .cache import CacheInfo, LRUCache, fingerprint
+
+TEMPLATE_FILE = (
+    Path(__file__).absolute().parent.joinpath("material.css.template")
+)
+
+# Rendered stylesheets, keyed by template and every render input.
+RENDER_CACHE = LRUCache(maxsize=16)
+
+_LOCK = threading.Lock()
+_ENVIRONMENTS = {}
+_TEMPLATES = {}
+_STATS = {"hits": 0, "misses": 0}
+_BYTECODE_CACHE = None
+_SECTIONS = {}
+
+# A banner line followed by the title of the widgets styled below it
+_SECTION = re.compile(r"^/\*\s+-{8,}\s+\*/\n/\*\s+(.+?)\s*\*/$", re.M)
+_MISSING = object()
+
+
+########################################################################
+class SectionedTemplate:
+    """A template split at its section banners and rendered per section.
+
+    Every section records the variables it reads, rendering again only
+    re-renders the sections reading a variable that changed since the
+    previous render and joins them with the kept output of the others.
+    """
+
+    # ----------------------------------------------------------------------
+    def __init__(self, environment, source, name=None, filename=None):
+        """Constructor
+
+        The code of every section goes through the bytecode cache of
+        `environment`, if any, under `name` and `filename`.
+        """
+        from jinja2 import meta
+
+        # Sections are joined back, so none may drop its last newline.
+        environment = environment.overlay(keep_trailing_newline=True)
+
+        starts = [(0, "Header")] + [
+            (match.start(), match.group(1))
+            for match in _SECTION.finditer(source)
+            if match.start()
+        ]
+        ends = [start for start, _ in starts[1:]] + [len(source)]
+
+        self.sections = []
+        for i, ((start, title), end) in enumerate(zip(starts, ends)):
+            ast = environment.parse(source[start:end], name, filename)
+            self.sections.append(
+                (
+                    title,
+                    _section_template(
+                        environment,
+                        ast,
+                        source[start:end],
+                        f"{name}#{i}",
+                        filename,
+                    ),
+                    frozenset(meta.find_undeclared_variables(ast)),
+                )
+            )
+
+        self.trailing_newline = source.endswith("\n")
+        self.rendered = []
+        self._context = None
+        self._outputs = [None] * len(self.sections)
+        self._lock = threading.Lock()
+
+    # ----------------------------------------------------------------------
+    def dependencies(self):
+        """Map every variable to the titles of the sections reading it."""
+        dependencies = {}
+        for title, _, variables in self.sections:
+            for variable in variables:
+                dependencies.setdefault(variable, []).append(title)
+        return {
+            variable: tuple(titles)
+            for variable, titles in sorted(dependencies.items())
+        }
+
+    # ----------------------------------------------------------------------
+    def render(self, context):
+        """"""
+        with self._lock:
+            if self._context is None:
+                changed = None
+            else:
+                changed = {
+                    key
+                    for key in context.keys() | self._context.keys()
+                    if context.get(key, _MISSING)
+                    != self._context.get(key, _MISSING)
+                }
+
+            self.rendered = []
+            for i, (title, template, variables) in enumerate(self.sections):
+                if changed is None or variables & changed:
+                    self._outputs[i] = template.render(context)
+                    self.rendered.append(title)
+
+            self._context = copy.deepcopy(context)
+            stylesheet = "".join(self._outputs)
+
+        # Like the whole template, drop a single trailing newline.
+        if self.trailing_newline and stylesheet.endswith("\n"):
+            stylesheet = stylesheet[:-1]
+        return stylesheet
+
+
+def _section_template(environment, ast, source, name, filename):
+    """Compile the section `ast`, or load its code from the bytecode cache
+    of `environment`.
+    """
+    cache = environment.bytecode_cache
+    if cache is None:
+        return environment.from_string(ast)
+
+    bucket = cache.get_bucket(environment, name, filename, source)
+    if bucket.code is None:
+        bucket.code = environment.compile(ast, name, filename)
+        cache.set_bucket(bucket)
+    return environment.template_class.from_code(
+        environment, bucket.code, environment.make_globals(None)
+    )
+
+
+def enable_bytecode_cache(directory=None):
+    """Store compiled custom templates on disk, in `directory`.
+
+    Only templates other than the bundled `TEMPLATE_FILE` use it, the bundled
+    one is compiled once per process and kept in memory.
+    """
+    global _BYTECODE_CACHE
+
+    import jinja2
+
+    if directory is None:
+        from .resources import RESOURCES_PATH
+
+        directory = os.path.join(RESOURCES_PATH, "jinja")
+    os.makedirs(directory, exist_ok=True)
+    with _LOCK:
+        _BYTECODE_CACHE = jinja2.FileSystemBytecodeCache(str(directory))
+        _ENVIRONMENTS.clear()
+
+
+def disable_bytecode_cache():
+    """"""
+    global _BYTECODE_CACHE
+
+    with _LOCK:
+        _BYTECODE_CACHE = None
+        _ENVIRONMENTS.clear()
+
+
+def get_template(template=TEMPLATE_FILE, filters=None):
+    """Return the compiled `template`, or None if it does not exist.
+
+    Templates are cached process wide by path and modification time, so
+    editing a custom template on disk is picked up on the next call.
+    """
+    key, env = _lookup(template, filters)
+    if key is None:
+        return None
+    return _compiled(key, env)
+
+
+def render_template(context, template=TEMPLATE_FILE, filters=None):
+    """Render `template` with `context`, or None if it does not exist.
+
+    The output is kept in `RENDER_CACHE`, keyed by the template and a
+    canonical hash of `context`, so rendering the same inputs again is a
+    dictionary lookup.
+    """
+    key, env = _lookup(template, filters)
+    if key is None:
+        return None
+
+    digest = fingerprint(key, context)
+    stylesheet = RENDER_CACHE.get(digest)
+    if stylesheet is None:
+        sectioned = _sectioned(key, env)
+        if sectioned is None:
+            stylesheet = _compiled(key, env).render(context)
+        else:
+            stylesheet = sectioned.render(context)
+        RENDER_CACHE.put(digest, stylesheet)
+    return stylesheet
+
+
+def template_sections(template=TEMPLATE_FILE, filters=None):
+    """Return the `SectionedTemplate` of `template`, or None."""
+    key, env = _lookup(template, filters)
+    if key is None:
+        return None
+    return _sectioned(key, env)
+
+
+def template_dependencies(template=TEMPLATE_FILE, filters=None):
+    """Map the variables of `template` to the titles of its sections."""
+    sectioned = template_sections(template, filters)
+    if sectioned is None:
+        return {}
+    return sectioned.dependencies()
+
+
+def _sectioned(key, env):
+    """Return the `SectionedTemplate` of the template of `key`, or None if
+    it can not be split at its banners and must always be rendered whole.
+
+    Built from the source, the whole template is only compiled then.
+    """
+    import jinja2
+
+    with _LOCK:
+        if key in _SECTIONS:
+            _STATS["hits"] += 1
+            return _SECTIONS[key]
+
+        _STATS["misses"] += 1
+        for stale in [k for k in _SECTIONS if k[0] == key[0]]:
+            del _SECTIONS[stale]
+
+        name = os.path.basename(key[0])
+        source, filename, _ = env.loader.get_source(env, name)
+        try:
+            _SECTIONS[key] = SectionedTemplate(env, source, name, filename)
+        except jinja2.TemplateSyntaxError:
+            # A block spans two sections.
+            _SECTIONS[key] = None
+        return _SECTIONS[key]
+
+
+def _compiled(key, env):
+    """Return the whole template of `key`, compiled once."""
+    with _LOCK:
+        compiled = _TEMPLATES.get(key)
+        if compiled is not None:
+            _STATS["hits"] += 1
+            return compiled
+
+        _STATS["misses"] += 1
+        for stale in [k for k in _TEMPLATES if k[0] == key[0]]:
+            del _TEMPLATES[stale]
+
+        compiled = env.get_template(os.path.basename(key[0]))
+        _TEMPLATES[key] = compiled
+        return compiled
+
+
+def _lookup(template, filters):
+    """Return the cache key and the environment of `template`, or None
+    twice if it does not exist.
+    """
+    path = os.path.abspath(template)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None, None
+
+    parent = os.path.dirname(path)
+    with _LOCK:
+        env = _environment(
+            parent, filters, path != os.path.abspath(TEMPLATE_FILE)
+        )
+    return (path, mtime), env
+
+
+def template_cache_info():
+    """Report hits, misses and size of the compiled template cache, whole
+    and sectioned templates.
+    """
+    return CacheInfo(
+        _STATS["hits"],
+        _STATS["misses"],
+        None,
+        len(_TEMPLATES) + len(_SECTIONS),
+    )
+
+
+def template_cache_clear():
+    """"""
+    with _LOCK:
+        _TEMPLATES.clear()
+        _SECTIONS.clear()
+        _ENVIRONMENTS.clear()
+        _STATS["hits"] = _STATS["misses"] = 0
+
+
+def stylesheet_cache_info():
+    """Report hits, misses, bound and size of the rendered stylesheets."""
+    return RENDER_CACHE.info()
+
+
+def stylesheet_cache_clear():
+    """"""
+    RENDER_CACHE.clear()
+
+
+def set_stylesheet_cache_size(maxsize=16, maxbytes=None):
+    """Bound the rendered stylesheets kept, by count and total length."""
+    RENDER_CACHE.resize(maxsize, maxbytes)
+
+
+def _environment(parent, filters, custom):
+    """Return the cached environment for templates in `parent`."""
+    # jinja2 is only imported once a template is needed.
+    import jinja2
+
+    bytecode_cache = _BYTECODE_CACHE if custom else None
+    key = (parent, custom)
+    env = _ENVIRONMENTS.get(key)
+    if env is None:
+        # The environment must not keep its own copy, `_TEMPLATES` decides
+        # when a template is stale.
+        env = jinja2.Environment(
+            autoescape=True,
+            loader=jinja2.FileSystemLoader(parent),
+            bytecode_cache=bytecode_cache,
+            cache_size=0,
+        )
+        _ENVIRONMENTS[key] = env
+    if filters:
+        env.filters.update(filters)
+    return env
@@ -0,0 +1,78 @@
+from dataclasses import dataclass, replace
+
+from .registry import COLORS, THEME_REGISTRY, is_light, parse_theme
+
+
+########################################################################
+@dataclass(frozen=True, slots=True)
+class Theme:
+    """An immutable theme, usable wherever a theme file name is.
+
+    `colors` holds the (name, value) pairs as defined, `invert_secondary`
+    swaps the light and dark secondary colors when the theme is read with
+    `as_dict`. Themes are hashable and compare by value, so they can key
+    any cache.
+    """
+
+    name: str
+    colors: tuple
+    light: bool = False
+    invert_secondary: bool = False
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def from_dict(cls, colors, name="", light=None):
+        """"""
+        missing = [color for color in COLORS if color not in colors]
+        if missing:
+            raise ValueError(f"Missing theme colors: {', '.join(missing)}")
+        if light is None:
+            light = is_light(name, colors)
+        return cls(name, tuple(colors.items()), light)
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def from_file(cls, path):
+        """"""
+        return cls.from_record(parse_theme(path))
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def from_registry(cls, name, registry=THEME_REGISTRY):
+        """Return the theme `name`, with or without `.xml`, of `registry`."""
+        record = registry.get(name)
+        if record is None:
+            raise KeyError(name)
+        return cls.from_record(record)
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def from_record(cls, record):
+        """"""
+        return cls(record.name, record.colors, record.light)
+
+    # ----------------------------------------------------------------------
+    def inverted(self, invert=True):
+        """Return this theme with its secondary colors inverted or not."""
+        if invert == self.invert_secondary:
+            return self
+        return replace(self, invert_secondary=invert)
+
+    # ----------------------------------------------------------------------
+    def as_dict(self):
+        """"""
+        colors = dict(self.colors)
+        if self.invert_secondary:
+            (
+                colors["secondaryLightColor"],
+                colors["secondaryDarkColor"],
+            ) = (
+                colors["secondaryDarkColor"],
+                colors["secondaryLightColor"],
+            )
+        return colors
+
+    # ----------------------------------------------------------------------
+    def color(self, role):
+        """"""
+        return self.as_dict()[role]